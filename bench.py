@@ -0,0 +1,537 @@
+"""
+Off-browser benchmarks for the render engine and the signal graph, run
+against the in-memory DOM in `browser.html`.
+
+    python bench.py
+"""
+
+import contextlib
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import fez
+from browser import html
+from fez import div, h2, span
+import rw_signal
+from fezcompile import component, precompile_module
+from rw_signal import signal, batch, batched, on_cleanup, SyntheticSignal
+
+ADJECTIVES = ["pretty", "large", "big", "small", "tall", "short", "long", "handsome"]
+NOUNS = ["table", "chair", "house", "bbq", "desk", "car", "pony", "cookie"]
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        yield
+
+
+def measure(name, fn):
+    html.MUTATIONS.clear()
+    tracemalloc.start()
+    with quiet():
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    ops = ", ".join(f"{k}={v}" for k, v in sorted(html.MUTATIONS.items()))
+    print(f"{name:<32} {elapsed * 1000:9.2f} ms {peak / 1024:9.0f} KiB   {ops}")
+
+
+class Table:
+    def __init__(self):
+        self.next_id = 0
+        self.rows, self.set_rows = signal([])
+        self.root = html.DIV()
+
+        def items():
+            for id, label, _ in self.rows():
+                yield fez.div(key=id)[fez.span[str(id)], fez.span[label]]
+
+        with quiet():
+            table = fez.div[SyntheticSignal.new(items, self.rows, line_from="rows")]
+            table.render(self.root)
+
+    def build(self, count):
+        rows = []
+        for _ in range(count):
+            i = self.next_id
+            self.next_id += 1
+            label = f"{ADJECTIVES[i % len(ADJECTIVES)]} {NOUNS[i % len(NOUNS)]}"
+            rows.append((i, *signal(label)))
+        return rows
+
+    def create(self, count):
+        self.set_rows(self.build(count))
+
+    def append(self, count):
+        self.set_rows(self.rows() + self.build(count))
+
+    def update_every_10th(self):
+        with batch():
+            for _, label, set_label in self.rows()[::10]:
+                set_label(label() + " !!!")
+
+    def swap(self):
+        rows = self.rows().copy()
+        rows[1], rows[-2] = rows[-2], rows[1]
+        self.set_rows(rows)
+
+    def insert_head(self):
+        self.set_rows(self.build(1) + self.rows())
+
+    def remove_every_10th(self):
+        self.set_rows([row for i, row in enumerate(self.rows()) if i % 10])
+
+    def reverse(self):
+        self.set_rows(self.rows()[::-1])
+
+    def clear(self):
+        self.set_rows([])
+
+
+def bench_rows():
+    for count in (1_000, 10_000):
+        table = Table()
+        measure(f"create {count} rows", lambda: table.create(count))
+        measure(f"replace {count} rows", lambda: table.create(count))
+        measure(f"update every 10th of {count}", table.update_every_10th)
+        measure(f"swap rows of {count}", table.swap)
+        measure(f"insert at head of {count}", table.insert_head)
+        measure(f"remove every 10th of {count}", table.remove_every_10th)
+        measure(f"reverse {len(table.rows())} rows", table.reverse)
+        measure(f"clear {len(table.rows())} rows", table.clear)
+        measure(f"append {count} to empty", lambda: table.append(count))
+
+
+def bench_virtual_list(count=50_000, steps=100):
+    rows, _ = signal([f"row {i}" for i in range(count)])
+    root = html.DIV()
+
+    def create():
+        fez.virtual_list(
+            items=rows,
+            row=lambda label, i: fez.div[fez.span[str(i)], fez.span[label]],
+            height=600,
+            row_height=24,
+        ).render(root)
+
+    def scroll():
+        viewport = root.firstChild
+        for step in range(1, steps + 1):
+            viewport.scrollTop = step * 240
+            viewport.dispatch("scroll")
+
+    measure(f"virtual list of {count} rows", create)
+    measure(f"scroll it {steps} x 10 rows", scroll)
+
+
+def bench_attributes(count=1_000):
+    selected, set_selected = signal(-1)
+    theme, set_theme = signal("light")
+    root = html.DIV()
+
+    def create():
+        fez.div[
+            tuple(
+                fez.div(
+                    key=i,
+                    cls={"row": True, "selected": lambda i=i: selected() == i},
+                    style={"color": lambda: "#000" if theme() == "light" else "#fff"},
+                )[fez.span[str(i)], fez.span["label"]]
+                for i in range(count)
+            )
+        ].render(root)
+
+    measure(f"create {count} bound rows", create)
+    measure(f"select 1 of {count} rows", lambda: set_selected(count // 2))
+    measure(f"move selection in {count}", lambda: set_selected(count // 2 + 1))
+    measure(f"theme {count} rows", lambda: set_theme("dark"))
+
+
+def bench_selector(count=10_000):
+    for name in ("compare", "selector"):
+        selected, set_selected = signal(-1)
+        with quiet():
+            is_selected = signal.selector(selected)
+        root = html.DIV()
+
+        def create():
+            fez.div[
+                tuple(
+                    fez.div(
+                        key=i,
+                        cls={
+                            "selected": (
+                                (lambda i=i: selected() == i)
+                                if name == "compare"
+                                else (lambda i=i: is_selected(i))
+                            )
+                        },
+                    )[str(i)]
+                    for i in range(count)
+                )
+            ].render(root)
+
+        with quiet():
+            create()
+        measure(f"{name}: select 1 of {count}", lambda: set_selected(count // 2))
+        measure(f"{name}: move selection", lambda: set_selected(count // 2 + 1))
+
+
+def bench_store(count=1_000):
+    def rows(read_row):
+        root = html.DIV()
+        fez.div[
+            tuple(
+                fez.div(key=i)[
+                    SyntheticSignal.new(
+                        lambda i=i: read_row(i)["label"], line_from="label"
+                    )
+                ]
+                for i in range(count)
+            )
+        ].render(root)
+
+    initial = [{"label": f"row {i}"} for i in range(count)]
+    state, set_state = signal(initial)
+    with quiet():
+        rows(lambda i: state()[i])
+
+    def replace():
+        new = state().copy()
+        new[count // 2] = {"label": "changed"}
+        set_state(new)
+
+    measure(f"signal: change 1 of {count}", replace)
+
+    with quiet():
+        tree = signal.store({"rows": [{"label": f"row {i}"} for i in range(count)]})
+        rows(lambda i: tree()["rows"][i])
+    measure(
+        f"store: change 1 of {count}",
+        lambda: tree.produce(lambda s: s["rows"][count // 2].update(label="changed")),
+    )
+
+
+class BOUND_BUTTON(fez.BUTTON, tag="button"):
+    """A button binding its handlers on its own node, as before delegation."""
+
+    def create(self):
+        elem = getattr(html, self.tag)()
+        self.bind_attributes(elem)
+        for name, handler in self.attrs.items():
+            if name[:3] == "on_":
+                handler = batched(handler)
+                elem.bind(name[3:], handler)
+                on_cleanup(lambda t=name[3:], h=handler: elem.unbind(t, h))
+        return self.render_children(elem)
+
+
+def bench_events(count=1_000, clicks=1_000):
+    for name, button in (("delegated", fez.button), ("bound", BOUND_BUTTON())):
+        counts = [signal(0) for _ in range(count)]
+        tree = fez.div[
+            tuple(
+                button(on_click=lambda ev, c=c, set_c=set_c: set_c(c() + 1))[c]
+                for c, set_c in counts
+            )
+        ]
+        root = html.DIV()
+
+        def click():
+            buttons = root.firstChild.childNodes
+            for i in range(clicks):
+                buttons[i * 7 % count].dispatch("click")
+
+        tracemalloc.start()
+        with quiet():
+            start = time.perf_counter()
+            tree.render(root)
+            elapsed = time.perf_counter() - start
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(
+            f"{f'create {count} buttons, {name}':<32} "
+            f"{elapsed * 1e6 / count:9.2f} us {size / count:9.0f} B   "
+            f"retained per node"
+        )
+        measure(f"click {clicks} buttons, {name}", click)
+
+        listeners = sum(len(v) for v in root.listeners.values())
+        for node in root.firstChild.childNodes:
+            listeners += sum(len(v) for v in node.listeners.values())
+        print(f"  {listeners} listener(s), {len(fez.events.handlers)} handlers")
+        fez.events.handlers.clear()
+
+
+def bench_deep_nesting(depth=300):
+    def nested():
+        value, set_value = signal(0)
+        element = fez.span[value]
+        for _ in range(depth):
+            element = fez.div[element]
+        element.render(html.DIV())
+        return set_value
+
+    set_value = None
+
+    def create():
+        nonlocal set_value
+        set_value = nested()
+
+    measure(f"create {depth} nested divs", create)
+    measure(f"update leaf of {depth} nested", lambda: set_value(1))
+
+
+@component
+def static_layout():
+    count, set_count = signal(0)
+    return div(cls="page")[
+        div(cls="header")[h2["Dashboard"], span["Signed in"]],
+        div(cls="nav")[span["Home"], span["Reports"], span["Settings"], span["Help"]],
+        div(cls="body")[
+            div(cls="card")[h2["Visitors"], span["Unique visitors this week"]],
+            div(cls="card")[h2["Revenue"], span["Gross revenue this week"]],
+            div(cls="card")[h2["Errors"], span["Errors this week"]],
+        ],
+        div(cls="footer")[span["Generated by fez"], span[count]],
+    ]
+
+
+def bench_static_layout(count=1_000):
+    root = html.DIV()
+
+    def render():
+        for _ in range(count):
+            static_layout().render(root)
+
+    measure(f"render {count} static layouts", render)
+
+
+def bench_elements(count=100_000):
+    def chained():
+        return [fez.div(cls="row", key=i)[fez.span["label"]] for i in range(count)]
+
+    def compiled():
+        # what a compiled component runs for the same expression
+        return [
+            fez.div.build(fez.span["label"], cls="row", key=i) for i in range(count)
+        ]
+
+    copies = 0
+    copy = fez.Element.copy
+
+    def counted_copy(self, **changes):
+        nonlocal copies
+        copies += 1
+        return copy(self, **changes)
+
+    for name, build in (("construct", chained), ("construct compiled", compiled)):
+        start = time.perf_counter()
+        build()
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        nodes = build()
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        copies = 0
+        fez.Element.copy = counted_copy
+        try:
+            build()
+        finally:
+            fez.Element.copy = copy
+        print(
+            f"{f'{name} {count} rows':<32} {elapsed * 1e6 / count:9.2f} us "
+            f"{size / len(nodes):9.0f} B   retained, "
+            f"{copies / count:.0f} elements allocated per div(...)[span[...]]"
+        )
+
+
+def bench_leak(rerenders=10_000, rows=20, tolerance=16 * 1024):
+    """
+    Re-render a keyed list whose rows all read one shared signal, replacing
+    every row each time. Memory, once garbage is collected, and the shared
+    signal's dependents must stay flat.
+    """
+    label, set_label = signal("row")
+    shift, set_shift = signal(0)
+
+    def items():
+        for i in range(shift(), shift() + rows):
+
+            def text():
+                return f"{label()} {i}"
+
+            row = SyntheticSignal.new(text, label, line_from="leak row")
+            yield fez.div(key=i)[fez.button(on_click=text)[row]]
+
+    root = html.DIV()
+    with quiet():
+        fez.div[SyntheticSignal.new(items, shift, line_from="leak")].render(root)
+
+    tracemalloc.start()
+    samples = []
+    with quiet():
+        for n in range(1, rerenders + 1):
+            set_shift(n * rows)
+            if n in (rerenders // 10, rerenders):
+                gc.collect()
+                samples.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+    grown = samples[1] - samples[0]
+    print(
+        f"{f'leak: {rerenders} list rerenders':<32} "
+        f"{grown / 1024:9.0f} KiB grown after warm-up, "
+        f"{len(label.dependents)} dependents of the shared signal"
+    )
+    if grown > tolerance or len(label.dependents) != rows:
+        raise AssertionError(
+            f"leak: {grown} bytes grown, {len(label.dependents)} dependents "
+            f"for {rows} rows"
+        )
+
+
+def bench_signal_graph(width=10_000, depth=1_000):
+    source, set_source = signal(0)
+    with quiet():
+        for _ in range(width):
+            SyntheticSignal.new(source, source, line_from="fan-out")
+    measure(f"fan out to {width} signals", lambda: set_source(1))
+
+    source, set_source = signal(0)
+    node = source
+    with quiet():
+        for _ in range(depth):
+            node = SyntheticSignal.new(node, node, line_from="chain")
+    measure(f"chain of {depth} signals", lambda: set_source(1))
+
+    source, set_source = signal(0)
+    with quiet():
+        left = SyntheticSignal.new(source, source, line_from="left")
+        right = SyntheticSignal.new(source, source, line_from="right")
+        joins = [
+            SyntheticSignal.new(source, left, right, line_from="join")
+            for _ in range(width)
+        ]
+
+    def writes():
+        with batch():
+            for i in range(10):
+                set_source(i)
+
+    measure(f"10 batched writes, {len(joins)} joins", writes)
+
+
+STARTUP_COMPONENT = """
+@component
+def card_{i}(title):
+    count, set_count = signal({i})
+    label, set_label = signal("card {i}")
+
+    def total():
+        return count() * 2
+
+    return div(cls="card")[
+        h2[title],
+        div(cls="body")[span["static text"], span[label], span[total]],
+        div(cls="footer")[span["footer"], span[count]],
+    ]
+"""
+
+
+def startup_app(components: int) -> str:
+    return (
+        "from fez import div, h2, span\n"
+        "from fezcompile import component\n"
+        "from rw_signal import signal\n"
+        + "".join(STARTUP_COMPONENT.format(i=i) for i in range(components))
+    )
+
+
+def bench_release(components=200, rows=10_000):
+    """
+    Compiled size of an app, and render time of a large list, in debug and
+    release mode.
+    """
+    source = startup_app(components)
+    source_map = []
+    debug = precompile_module(source)
+    release = precompile_module(source, source_map)
+    print(
+        f"{f'compile {components} components':<32} "
+        f"{len(debug.encode()) / 1024:9.1f} KiB debug, "
+        f"{len(release.encode()) / 1024:.1f} KiB release "
+        f"+ {len(json.dumps(source_map).encode()) / 1024:.1f} KiB source map"
+    )
+
+    previous = rw_signal.DEBUG
+    for mode, debug in [("debug", True), ("release", False)]:
+        rw_signal.DEBUG = debug
+        table = Table()
+        measure(f"create {rows} rows, {mode}", lambda: table.create(rows))
+    rw_signal.DEBUG = previous
+
+
+def bench_startup(components=200):
+    """
+    Import an app of `components` components in a fresh interpreter, without
+    the compiled-component cache, while filling it, and from it.
+    """
+    with tempfile.TemporaryDirectory() as app:
+        with open(os.path.join(app, "app.py"), "w") as f:
+            f.write(startup_app(components))
+
+        env = {**os.environ, "PYTHONPATH": os.path.dirname(os.path.abspath(__file__))}
+        for name, setup in [
+            ("uncached", "fezcompile.cache = None"),
+            ("cold cache", "pass"),
+            ("warm cache", "pass"),
+        ]:
+            script = (
+                "import time, fezcompile\n"
+                f"{setup}\n"
+                "start = time.perf_counter()\n"
+                "import app\n"
+                "print(time.perf_counter() - start)\n"
+            )
+            out = subprocess.run(
+                [sys.executable, "-c", script],
+                cwd=app,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            elapsed = float(out.split()[-1])
+            print(
+                f"{f'import {components} components, {name}':<32} "
+                f"{elapsed * 1000:9.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    sys.setrecursionlimit(10_000)
+    print(f"{'scenario':<32} {'wall':>12} {'peak alloc':>13}   DOM ops")
+    bench_elements()
+    bench_rows()
+    bench_virtual_list()
+    bench_attributes()
+    bench_selector()
+    bench_store()
+    bench_events()
+    bench_deep_nesting()
+    bench_static_layout()
+    bench_leak()
+    bench_signal_graph()
+    bench_startup()
+    bench_release()
@@ -1 +1,4 @@
-from .html import DOMNode
+from .html import DOMNode, Document, Window
+
+document = Document()
+window = Window()
@@ -1,19 +1,373 @@
+"""
+In-memory stand-in for Brython's `browser.html`, so that rendering can run
+and be measured on the stock interpreter. Every DOM mutation is counted in
+`MUTATIONS`.
+"""
+
+from collections import Counter
+from html import escape
+from html.parser import HTMLParser
 from typing import Callable
 
+MUTATIONS: Counter[str] = Counter()
+
+VOID_TAGS = {"br", "hr", "img", "input", "link", "meta"}
+
+
+class Event:
+    def __init__(self, type: str, target=None):
+        self.type = type
+        self.target = target
+        self.currentTarget = None
+        self.cancelBubble = False
+
+    def stopPropagation(self):
+        self.cancelBubble = True
+
 
 class DOMNode:
+    nodeType: int = 1
+
+    def __init__(self):
+        MUTATIONS["create"] += 1
+        self.parentNode: DOMNode | None = None
+        self.firstChild: DOMNode | None = None
+        self.lastChild: DOMNode | None = None
+        self.previousSibling: DOMNode | None = None
+        self.nextSibling: DOMNode | None = None
+        self.listeners: dict[str, list[Callable]] = {}
+
+    @property
+    def parentElement(self):
+        return self.parentNode
+
+    @property
+    def childNodes(self) -> list["DOMNode"]:
+        nodes = []
+        node = self.firstChild
+        while node is not None:
+            nodes.append(node)
+            node = node.nextSibling
+        return nodes
+
     def clear(self):
-        pass
+        while self.firstChild is not None:
+            self.remove(self.firstChild)
 
     def attach(self, e):
-        pass
+        if isinstance(e, (str, int, float)):
+            e = TextNode(str(e))
+        MUTATIONS["attach"] += 1
+        self._link(e, None)
+        return e
 
-    def bind(self, name: str, handler: Callable):
-        pass
+    def insertBefore(self, child, reference):
+        MUTATIONS["insertBefore"] += 1
+        self._link(child, reference)
+        return child
+
+    def replaceChild(self, new, old):
+        MUTATIONS["replaceChild"] += 1
+        reference = old.nextSibling
+        self._unlink(old)
+        self._link(new, reference)
+        return old
 
     def remove(self, child):
-        pass
+        MUTATIONS["remove"] += 1
+        self._unlink(child)
+
+    def bind(self, name: str, handler: Callable):
+        MUTATIONS["bind"] += 1
+        self.listeners.setdefault(name, []).append(handler)
+
+    def unbind(self, name: str, handler: Callable | None = None):
+        MUTATIONS["unbind"] += 1
+        if handler is None:
+            self.listeners.pop(name, None)
+        elif handler in self.listeners.get(name, ()):
+            self.listeners[name].remove(handler)
+
+    def dispatch(self, name: str, event: Event | None = None) -> Event:
+        """Fire `name` on this node and bubble it up through its ancestors."""
+        event = event or Event(name)
+        event.target = event.target or self
+        node = self
+        while node is not None and not event.cancelBubble:
+            event.currentTarget = node
+            for handler in list(node.listeners.get(name, ())):
+                handler(event)
+            node = node.parentNode
+        return event
+
+    def cloneNode(self, deep: bool = False):
+        clone = self._shallow_clone()
+        if deep:
+            node = self.firstChild
+            while node is not None:
+                clone._link(node.cloneNode(True), None)
+                node = node.nextSibling
+        return clone
 
     @property
-    def parentElement(self):
-        pass
+    def textContent(self) -> str:
+        return "".join(
+            node.textContent for node in self.childNodes if node.nodeType != 8
+        )
+
+    @textContent.setter
+    def textContent(self, value):
+        self.clear()
+        if str(value):
+            self.attach(TextNode(str(value)))
+
+    @property
+    def innerHTML(self) -> str:
+        return "".join(node.outerHTML for node in self.childNodes)
+
+    @innerHTML.setter
+    def innerHTML(self, value):
+        MUTATIONS["innerHTML"] += 1
+        self.clear()
+        parser = _Parser(self)
+        parser.feed(str(value))
+        parser.close()
+
+    def _shallow_clone(self):
+        return type(self)()
+
+    def _link(self, child, reference):
+        if child.parentNode is not None:
+            child.parentNode._unlink(child)
+        child.parentNode = self
+        child.nextSibling = reference
+        if reference is None:
+            child.previousSibling = self.lastChild
+            self.lastChild = child
+        else:
+            child.previousSibling = reference.previousSibling
+            reference.previousSibling = child
+        if child.previousSibling is None:
+            self.firstChild = child
+        else:
+            child.previousSibling.nextSibling = child
+
+    def _unlink(self, child):
+        if child.previousSibling is None:
+            self.firstChild = child.nextSibling
+        else:
+            child.previousSibling.nextSibling = child.nextSibling
+        if child.nextSibling is None:
+            self.lastChild = child.previousSibling
+        else:
+            child.nextSibling.previousSibling = child.previousSibling
+        child.parentNode = child.previousSibling = child.nextSibling = None
+
+
+class TextNode(DOMNode):
+    nodeType = 3
+
+    def __init__(self, data: str = ""):
+        super().__init__()
+        self.data = data
+
+    @property
+    def textContent(self) -> str:
+        return self.data
+
+    @textContent.setter
+    def textContent(self, value):
+        MUTATIONS["text"] += 1
+        self.data = str(value)
+
+    @property
+    def outerHTML(self) -> str:
+        return escape(self.data, quote=False)
+
+    def splitText(self, offset: int):
+        MUTATIONS["splitText"] += 1
+        rest = TextNode(self.data[offset:])
+        self.data = self.data[:offset]
+        if self.parentNode is not None:
+            self.parentNode._link(rest, self.nextSibling)
+        return rest
+
+    def _shallow_clone(self):
+        return TextNode(self.data)
+
+
+class Comment(DOMNode):
+    nodeType = 8
+
+    def __init__(self, data: str = ""):
+        super().__init__()
+        self.data = data
+
+    @property
+    def outerHTML(self) -> str:
+        return f"<!--{self.data}-->"
+
+    def _shallow_clone(self):
+        return Comment(self.data)
+
+
+class Style:
+    """`element.style`, kept in the element's `style` attribute."""
+
+    def __init__(self, element: "HTMLElement"):
+        self.element = element
+
+    def properties(self) -> dict[str, str]:
+        properties = {}
+        for declaration in self.element.attrs.get("style", "").split(";"):
+            name, _, value = declaration.partition(":")
+            if name.strip():
+                properties[name.strip()] = value.strip()
+        return properties
+
+    def getPropertyValue(self, name: str) -> str:
+        return self.properties().get(name, "")
+
+    def setProperty(self, name: str, value):
+        MUTATIONS["style"] += 1
+        self._write({**self.properties(), name: str(value)})
+
+    def removeProperty(self, name: str):
+        MUTATIONS["style"] += 1
+        properties = self.properties()
+        properties.pop(name, None)
+        self._write(properties)
+
+    @property
+    def cssText(self) -> str:
+        return self.element.attrs.get("style", "")
+
+    def _write(self, properties: dict[str, str]):
+        text = "; ".join(f"{k}: {v}" for k, v in properties.items())
+        if text:
+            self.element.attrs["style"] = text
+        else:
+            self.element.attrs.pop("style", None)
+
+
+class HTMLElement(DOMNode):
+    tagName = ""
+
+    def __init__(self, content=None, **attrs):
+        super().__init__()
+        self.attrs: dict[str, str] = {k: str(v) for k, v in attrs.items()}
+        if content is not None:
+            self.attach(content)
+
+    def getAttribute(self, name: str) -> str | None:
+        return self.attrs.get(name)
+
+    def setAttribute(self, name: str, value):
+        MUTATIONS["setAttribute"] += 1
+        self.attrs[name] = str(value)
+
+    def removeAttribute(self, name: str):
+        MUTATIONS["removeAttribute"] += 1
+        self.attrs.pop(name, None)
+
+    @property
+    def id(self) -> str:
+        return self.attrs.get("id", "")
+
+    @property
+    def style(self) -> Style:
+        return Style(self)
+
+    @property
+    def outerHTML(self) -> str:
+        tag = self.tagName.lower()
+        attrs = "".join(f' {k}="{escape(v)}"' for k, v in self.attrs.items())
+        if tag in VOID_TAGS:
+            return f"<{tag}{attrs}>"
+        return f"<{tag}{attrs}>{self.innerHTML}</{tag}>"
+
+    def _shallow_clone(self):
+        clone = type(self)()
+        clone.attrs = self.attrs.copy()
+        return clone
+
+
+class Document(HTMLElement):
+    tagName = "HTML"
+
+    def createTextNode(self, text: str) -> TextNode:
+        return TextNode(text)
+
+    def createComment(self, text: str) -> Comment:
+        return Comment(text)
+
+    def getElementById(self, id: str) -> DOMNode | None:
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node is not self and getattr(node, "id", None) == id:
+                return node
+            stack.extend(node.childNodes)
+        return None
+
+    def __getitem__(self, id: str) -> DOMNode:
+        node = self.getElementById(id)
+        if node is None:
+            raise KeyError(id)
+        return node
+
+
+class Window:
+    def __init__(self):
+        self.frame_callbacks: list[Callable] = []
+
+    def requestAnimationFrame(self, callback: Callable):
+        self.frame_callbacks.append(callback)
+        return len(self.frame_callbacks)
+
+    def animation_frame(self, timestamp: float = 0):
+        """Run the callbacks requested before this frame, like a browser would."""
+        callbacks, self.frame_callbacks = self.frame_callbacks, []
+        for callback in callbacks:
+            callback(timestamp)
+
+
+class _Parser(HTMLParser):
+    def __init__(self, root: DOMNode):
+        super().__init__(convert_charrefs=True)
+        self.stack = [root]
+
+    def handle_starttag(self, tag, attrs):
+        elem = element_class(tag.upper())(**{k: v or "" for k, v in attrs})
+        self.stack[-1].attach(elem)
+        if tag not in VOID_TAGS:
+            self.stack.append(elem)
+
+    def handle_endtag(self, tag):
+        if len(self.stack) > 1 and tag not in VOID_TAGS:
+            self.stack.pop()
+
+    def handle_data(self, data):
+        last = self.stack[-1].lastChild
+        if isinstance(last, TextNode):
+            last.data += data
+        else:
+            self.stack[-1].attach(TextNode(data))
+
+    def handle_comment(self, data):
+        self.stack[-1].attach(Comment(data))
+
+
+_element_classes: dict[str, type[HTMLElement]] = {}
+
+
+def element_class(tag: str) -> type[HTMLElement]:
+    if tag not in _element_classes:
+        _element_classes[tag] = type(tag, (HTMLElement,), {"tagName": tag})
+    return _element_classes[tag]
+
+
+def __getattr__(name: str):
+    if name.isupper():
+        return element_class(name)
+    raise AttributeError(name)
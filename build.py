@@ -0,0 +1,150 @@
+"""
+Ahead-of-time build: precompile every module in a source tree into a dist
+directory, so the served files never need compiling at runtime.
+
+    python build.py [source] [dist] [--release]
+
+Release builds also write `fez-sourcemap.json`, the `line_from` text behind
+each index in a compiled module.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from fezcompile import COMPILER_VERSION, precompile_module, source_hash
+
+MANIFEST = "fez-manifest.json"
+SOURCE_MAP = "fez-sourcemap.json"
+SKIP_DIRS = {"__pycache__", "__fezcache__", ".git", ".venv", "venv", "node_modules"}
+
+
+def walk(source: str, dist: str):
+    dist = os.path.abspath(dist)
+    for root, dirs, files in os.walk(source):
+        dirs[:] = [
+            d
+            for d in dirs
+            if d not in SKIP_DIRS
+            and not d.startswith(".")
+            and os.path.abspath(os.path.join(root, d)) != dist
+        ]
+        for name in files:
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, source).replace(os.sep, "/")
+
+
+def load_manifest(dist: str, release: bool = False) -> dict:
+    try:
+        with open(os.path.join(dist, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get("compiler_version") != COMPILER_VERSION:
+        return {}
+    if manifest.get("release", False) != release:
+        return {}
+    return manifest.get("files", {})
+
+
+def load_source_map(dist: str) -> dict[str, list[str]]:
+    try:
+        with open(os.path.join(dist, SOURCE_MAP)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def compile_file(source_path: str, dist_path: str, release: bool = False):
+    source_map = [] if release else None
+    with open(source_path, encoding="utf-8") as f:
+        compiled = precompile_module(f.read(), source_map)
+    os.makedirs(os.path.dirname(dist_path), exist_ok=True)
+    with open(dist_path, "w", encoding="utf-8") as f:
+        f.write(compiled)
+    return source_map
+
+
+def build(
+    source: str, dist: str, workers: int | None = None, release: bool = False
+) -> dict[str, list[str]]:
+    previous = load_manifest(dist, release)
+    files = {}
+    changed = []
+    for rel in walk(source, dist):
+        with open(os.path.join(source, rel), "rb") as f:
+            files[rel] = source_hash(f.read())
+        if previous.get(rel) != files[rel] or not os.path.exists(
+            os.path.join(dist, rel)
+        ):
+            changed.append(rel)
+
+    compiled = [rel for rel in changed if rel.endswith(".py")]
+    source_map = load_source_map(dist) if release and previous else {}
+    with ProcessPoolExecutor(workers) as pool:
+        futures = {
+            rel: pool.submit(
+                compile_file,
+                os.path.join(source, rel),
+                os.path.join(dist, rel),
+                release,
+            )
+            for rel in compiled
+        }
+        for rel in changed:
+            if not rel.endswith(".py"):
+                os.makedirs(os.path.dirname(os.path.join(dist, rel)), exist_ok=True)
+                shutil.copyfile(os.path.join(source, rel), os.path.join(dist, rel))
+        for rel, future in futures.items():
+            texts = future.result()
+            if texts:
+                source_map[rel] = texts
+            else:
+                source_map.pop(rel, None)
+
+    removed = [rel for rel in previous if rel not in files]
+    for rel in removed:
+        source_map.pop(rel, None)
+        if os.path.exists(os.path.join(dist, rel)):
+            os.remove(os.path.join(dist, rel))
+
+    if release:
+        with open(os.path.join(dist, SOURCE_MAP), "w") as f:
+            json.dump(source_map, f, indent=2)
+    elif os.path.exists(os.path.join(dist, SOURCE_MAP)):
+        os.remove(os.path.join(dist, SOURCE_MAP))
+
+    with open(os.path.join(dist, MANIFEST), "w") as f:
+        json.dump(
+            {"compiler_version": COMPILER_VERSION, "release": release, "files": files},
+            f,
+            indent=2,
+        )
+
+    return {"compiled": compiled, "changed": changed, "removed": removed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("source", nargs="?", default=".")
+    parser.add_argument("dist", nargs="?", default="dist")
+    parser.add_argument("-j", "--workers", type=int, default=None)
+    parser.add_argument(
+        "--release", action="store_true", help="strip debug metadata and logging"
+    )
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.dist, exist_ok=True)
+    result = build(args.source, args.dist, args.workers, args.release)
+    print(
+        f"{len(result['compiled'])} compiled, "
+        f"{len(result['changed']) - len(result['compiled'])} copied, "
+        f"{len(result['removed'])} removed -> {args.dist}"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
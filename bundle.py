@@ -0,0 +1,247 @@
+"""
+Bundle an app into one Brython VFS script: every module reachable from the
+entry modules, precompiled, so the page loads in a single request.
+
+    python bundle.py [entry ...] [--page index.html] [-o fez.bundle.js]
+                     [--shake] [--release]
+
+Load it after brython.js and before the page's Python scripts:
+
+    <script type="text/javascript" src="fez.bundle.js"></script>
+
+With `--page`, every module the page's Python scripts import is an entry
+too, so nothing the page needs is left out. With `--shake`, fezcompile is
+replaced by a stub when every use of `component` was compiled away,
+dropping the compiler and its imports.
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+import textwrap
+import time
+from html.parser import HTMLParser
+
+from fezcompile import local_names, precompile_module
+
+# modules Brython provides itself; `browser` here is the headless stand-in
+EXCLUDE = {"browser"}
+
+COMPILER_STUB = '''"""
+Stand-in for fezcompile in bundles whose components are all precompiled.
+"""
+
+
+def component(fn):
+    raise RuntimeError(f"{fn.__qualname__} was not precompiled into the bundle")
+'''
+
+
+def module_path(source: str, name: str) -> tuple[str, bool] | None:
+    """The file defining module `name` under `source`, and if it is a package."""
+    base = os.path.join(source, *name.split("."))
+    if os.path.isfile(base + ".py"):
+        return base + ".py", False
+    if os.path.isfile(os.path.join(base, "__init__.py")):
+        return os.path.join(base, "__init__.py"), True
+    return None
+
+
+def imported_names(tree: ast.Module, name: str, is_package: bool) -> list[str]:
+    """Every module `tree` may import, including parent packages."""
+    package = name if is_package else name.rpartition(".")[0]
+    names = []
+    for node in ast.walk(tree):
+        match node:
+            case ast.Import(names=aliases):
+                names.extend(alias.name for alias in aliases)
+            case ast.ImportFrom(module=module, names=aliases, level=level):
+                if level:
+                    parts = package.split(".") if package else []
+                    parts = parts[: len(parts) - level + 1]
+                    module = ".".join([*parts, *([module] if module else [])])
+                if module:
+                    names.append(module)
+                    names.extend(f"{module}.{alias.name}" for alias in aliases)
+
+    result = []
+    for imported in names:
+        parts = imported.split(".")
+        result.extend(".".join(parts[: i + 1]) for i in range(len(parts)))
+    return result
+
+
+class PageScripts(HTMLParser):
+    """The Python scripts of a page: inline sources and `src` modules."""
+
+    def __init__(self):
+        super().__init__()
+        self.sources: list[str] = []
+        self.modules: list[str] = []
+        self.inline = False
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag != "script" or attrs.get("type") != "text/python":
+            return
+        src = attrs.get("src")
+        if src:
+            self.modules.append(src.removesuffix(".py").replace("/", "."))
+        else:
+            self.inline = True
+            self.sources.append("")
+
+    def handle_endtag(self, tag):
+        if tag == "script":
+            self.inline = False
+
+    def handle_data(self, data):
+        if self.inline:
+            self.sources[-1] += data
+
+
+def page_entries(path: str) -> list[str]:
+    """The modules the Python scripts of the page at `path` import."""
+    with open(path, encoding="utf-8") as f:
+        scripts = PageScripts()
+        scripts.feed(f.read())
+    entries = list(scripts.modules)
+    for source in scripts.sources:
+        entries.extend(imported_names(ast.parse(textwrap.dedent(source)), "", False))
+    return [
+        name for name in dict.fromkeys(entries) if name.split(".")[0] not in EXCLUDE
+    ]
+
+
+def uses_compiler(tree: ast.Module) -> bool:
+    """If anything besides an import still refers to fezcompile."""
+    aliases = set()
+    for node in ast.walk(tree):
+        match node:
+            case ast.ImportFrom(module="fezcompile", names=names):
+                aliases.update(a.asname or a.name for a in names)
+            case ast.Import(names=names):
+                aliases.update(
+                    a.asname or a.name for a in names if a.name == "fezcompile"
+                )
+
+    def refers(node: ast.AST, names: set[str]) -> bool:
+        match node:
+            case ast.Name(id=id, ctx=ast.Load()):
+                return id in names
+            case ast.FunctionDef() | ast.AsyncFunctionDef():
+                inner = names - local_names(node)
+                return any(refers(d, names) for d in node.decorator_list) or any(
+                    refers(child, inner) for child in node.body
+                )
+        return any(refers(child, names) for child in ast.iter_child_nodes(node))
+
+    return refers(tree, aliases)
+
+
+def bundle(
+    source: str,
+    entries: list[str],
+    shake: bool = False,
+    source_map: list[str] | None = None,
+) -> dict[str, list]:
+    """
+    Precompile every local module reachable from `entries`, as Brython VFS
+    entries: `[".py", source, imports]`, with a trailing 1 for packages.
+    """
+    modules = {}
+    trees = {}
+    pending = list(entries)
+    while pending:
+        name = pending.pop()
+        if name in modules:
+            continue
+        found = module_path(source, name)
+        if found is None:
+            continue
+        path, is_package = found
+        with open(path, encoding="utf-8") as f:
+            compiled = precompile_module(f.read(), source_map)
+        trees[name] = ast.parse(compiled)
+        names = imported_names(trees[name], name, is_package)
+        imports = [
+            imported
+            for imported in dict.fromkeys(names)
+            if imported != name
+            and imported.split(".")[0] not in EXCLUDE
+            and module_path(source, imported)
+        ]
+        modules[name] = [".py", compiled, imports, *([1] if is_package else [])]
+        pending.extend(imports)
+
+    if shake and "fezcompile" in modules:
+        users = [name for name, tree in trees.items() if uses_compiler(tree)]
+        if users:
+            print(f"not shaking fezcompile, still used by {users}", file=sys.stderr)
+        else:
+            modules = {
+                name: module
+                for name, module in modules.items()
+                if name == "fezcompile" or name in reachable(modules, entries)
+            }
+            modules["fezcompile"] = [".py", COMPILER_STUB, []]
+    return modules
+
+
+def reachable(modules: dict[str, list], entries: list[str]) -> set[str]:
+    """Modules still imported once fezcompile no longer imports anything."""
+    seen = set()
+    pending = [name for name in entries if name in modules]
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        if name != "fezcompile":
+            pending.extend(m for m in modules[name][2] if m in modules)
+    return seen
+
+
+def write_bundle(modules: dict[str, list], out: str):
+    scripts = {"$timestamp": int(time.time() * 1000), **modules}
+    with open(out, "w", encoding="utf-8") as f:
+        f.write("__BRYTHON__.use_VFS = true;\n")
+        f.write(f"var scripts = {json.dumps(scripts)};\n")
+        f.write("__BRYTHON__.update_VFS(scripts);\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("entries", nargs="*", default=["fez", "rw_signal"])
+    parser.add_argument("-s", "--source", default=".")
+    parser.add_argument(
+        "--page", action="append", default=[], help="bundle what this page imports"
+    )
+    parser.add_argument("-o", "--out", default="fez.bundle.js")
+    parser.add_argument(
+        "--shake", action="store_true", help="replace fezcompile with a stub"
+    )
+    parser.add_argument(
+        "--release", action="store_true", help="strip debug metadata and logging"
+    )
+    args = parser.parse_args(argv)
+
+    entries = list(args.entries)
+    for page in args.page:
+        entries.extend(page_entries(page))
+    source_map = [] if args.release else None
+    modules = bundle(args.source, entries, args.shake, source_map)
+    write_bundle(modules, args.out)
+    if source_map is not None:
+        with open(f"{args.out}.map.json", "w") as f:
+            json.dump(source_map, f, indent=2)
+    print(
+        f"{len(modules)} modules ({', '.join(sorted(modules))}) -> {args.out}, "
+        f"{os.path.getsize(args.out) / 1024:.1f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
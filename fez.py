@@ -1,145 +1,708 @@
-import copy
+import bisect
 import inspect
+import json
 import re
 
-from typing import TypedDict, Callable, Unpack
+from html import escape
+from typing import TypedDict, Callable, Iterator, Unpack
 
-from browser import DOMNode, html
+from browser import DOMNode, document, html
 from fezcompile import component
-from rw_signal import signal, ReadSignal, SyntheticSignal
+from rw_signal import (
+    signal,
+    Owned,
+    Owner,
+    ReadSignal,
+    SyntheticSignal,
+    batch,
+    batched,
+    current_owner,
+    dump_signals,
+    on_cleanup,
+    own_each,
+    owned_by,
+    resume_signals,
+)
 
 to_css_re = re.compile(r"[A-Z]?[a-z_]+")
+TEXT_NODE = 3
 
 
-class ElementMeta(type(DOMNode)):
+class ElementMeta(type):
     def __new__(mcls, name, bases, attrs, *, tag: str = ""):
+        attrs.setdefault("__slots__", ())
         new = super().__new__(mcls, name, bases, attrs)
         new.tag = tag.upper()
+        new.fields = tuple(
+            field
+            for klass in reversed(new.__mro__)
+            for field in klass.__dict__.get("__slots__", ())
+        )
         return new
 
 
-class Elem(DOMNode, metaclass=ElementMeta):
+class Elem(metaclass=ElementMeta):
     pass
 
 
 type Renderable = str | int | float | Elem | ReadSignal | Callable[[], Renderable]
 
 
+type Attribute = str | int | float | bool | None | ReadSignal | Callable[[], Attribute]
+
+
 class Styles(TypedDict, total=False):
-    color: str
-    backgroundColor: str
+    color: Attribute
+    backgroundColor: Attribute
 
 
 class Kwargs(TypedDict, total=False):
-    style: Styles
-    cls: list[str] | str
+    style: Styles | str | ReadSignal | Callable[[], Styles]
+    cls: list[Attribute] | dict[str, Attribute] | Attribute
     key: str | int
 
 
-def copy_self(fn):
-    def wrapper(self, *args, **kwargs):
-        new = type(self)()
-        for k, v in self.__dict__.items():
-            setattr(new, k, v)
-        return fn(new, *args, **kwargs)
+class Element(Elem):
+    """
+    An immutable description of a DOM element. Calling or subscripting an
+    element returns a changed copy. Compiled components build
+    `div(cls=...)[children]` with a single copy, through `build`.
 
-    return wrapper
+    `style`, `cls` and any other keyword attributes may be signals or
+    functions, also inside a style or class dict; each attribute is then
+    bound on its own and patched only where its value changed. Keywords
+    starting with `on_`, such as `on_click`, are event handlers; they are
+    kept with the attributes, so an element without any costs nothing more.
+    """
 
+    __slots__ = ("children", "styles", "cls", "attrs", "key")
 
-class Element(Elem):
     def __init__(self):
-        self.children: tuple[Renderable, ...] = ()
-        self.styles = ""
-        self.cls = ""
-        self.key = ""
+        self.set(
+            children=(),
+            styles=None,
+            cls=None,
+            attrs=None,
+            key="",
+        )
 
     def __setattr__(self, key, value):
-        super().__setattr__(key, value)
-        self.__dict__[key] = value
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def set(self, **values):
+        for k, v in values.items():
+            object.__setattr__(self, k, v)
+
+    def copy(self, **changes):
+        new = object.__new__(type(self))
+        for field in self.fields:
+            object.__setattr__(new, field, getattr(self, field))
+        new.set(**changes)
+        return new
 
-    @copy_self
     def __call__(self, **kwargs: Unpack[Kwargs]):
-        self.styles = kwargs.get("style", "")
-        cls = kwargs.get("cls", "")
-        self.cls = cls if isinstance(cls, str) else " ".join(cls)
-        self.key = str(kwargs.get("key", ""))
-        return self
+        key = kwargs.pop("key", "")
+        return self.copy(
+            styles=kwargs.pop("style", None),
+            cls=kwargs.pop("cls", None),
+            key=str(key),
+            attrs=kwargs or None,
+        )
 
-    @copy_self
     def __getitem__(self, item: tuple[Renderable, ...] | Renderable):
-        if isinstance(item, tuple):
-            self.children = item
-        else:
-            self.children = (item,)
-        return self
+        return self.copy(children=item if isinstance(item, tuple) else (item,))
 
-    def render(self, parent: Elem) -> Elem:
-        elem = getattr(html, self.tag)()
+    def build(self, item: tuple[Renderable, ...] | Renderable, /, *args, **kwargs):
+        """`self(*args, **kwargs)[item]`, without copying the called element."""
+        new = self(*args, **kwargs)
+        new.set(children=item if isinstance(item, tuple) else (item,))
+        return new
+
+    def hoist(self) -> "Static":
+        return Static(self)
+
+    def render(self, parent: DOMNode) -> DOMNode:
+        delegated = events.next_id
+        elem = self.create()
+        if events.next_id != delegated:
+            events.cover(parent)
         parent.attach(elem)
+        return elem
+
+    def create(self) -> DOMNode:
+        elem = getattr(html, self.tag)()
+        self.bind_attributes(elem)
+        if self.attrs:
+            events.on(elem, self.attrs)
+        return self.render_children(elem)
+
+    def attributes(self) -> Iterator[tuple[str, object]]:
+        if self.cls is not None:
+            yield "class", self.cls
+        if self.styles is not None:
+            yield "style", self.styles
+        if self.attrs:
+            for name, value in self.attrs.items():
+                if name[:3] != "on_":
+                    yield name.rstrip("_").replace("_", "-"), value
+
+    def bind_attributes(self, elem: DOMNode, hydrating: bool = False):
+        """
+        Set the attributes on `elem`, or with `hydrating` trust that they
+        were rendered, and bind the reactive ones to patch their changes.
+        """
+        for name, value in self.attributes():
+            if is_reactive(value):
+                bind_attribute(elem, name, value, hydrating)
+            elif not hydrating:
+                patch_attribute(elem, name, None, attribute_value(name, value))
+
+    def attributes_html(self) -> str:
+        parts = []
+        for name, value in self.attributes():
+            value = attribute_value(name, resolve(value))
+            if name == "style":
+                value = style_text(value) or None
+            if value is not None:
+                parts.append(f' {name}="{escape(value)}"')
+        return "".join(parts)
+
+    def render_children(self, elem: DOMNode) -> DOMNode:
         for child in self.children:
             if isinstance(child, Element):
-                child.render(elem)
-            elif isinstance(child, ReadSignal):
-                if not isinstance(child, SyntheticSignal):
-                    child = SyntheticSignal.new(child, child, line_from=child.line_from)
+                elem.attach(child.create())
+            elif is_dynamic(child):
+                child = as_synthetic(child)
+                with owned_by(Owner(current_owner())) as owner:
+                    value = child.evaluate()
+                    if is_items(value):
+                        self.render_generator(child, elem, owned_items(value), owner)
+                    else:
+                        self.render_single(child, elem, value, owner)
+            elif isinstance(child, (str, int, float)):
+                elem.attach(document.createTextNode(str(child)))
+
+        return elem
+
+    def hydrate(self, elem: DOMNode) -> DOMNode:
+        """
+        Adopt `elem`, server-rendered from this tree by `stream_html`,
+        binding signals to the existing nodes instead of creating new ones.
+        """
+        self.bind_attributes(elem, hydrating=True)
+        if self.attrs:
+            events.on(elem, self.attrs)
+        node = elem.firstChild
+        for child in self.children:
+            if isinstance(child, Element):
+                child.hydrate(node)
+                node = node.nextSibling
+            elif is_dynamic(child):
+                child = as_synthetic(child)
+                with owned_by(Owner(current_owner())) as owner:
+                    value = child.evaluate()
+                    if is_items(value):
+                        node = self.hydrate_generator(
+                            child, elem, owned_items(value), node, owner
+                        )
+                    else:
+                        res = hydrate_item(elem, value, node)
+                        self.bind_single(child, elem, res, owner)
+                        node = res.nextSibling
+            elif isinstance(child, (str, int, float)):
+                node = hydrate_item(elem, child, node).nextSibling
+
+        return elem
+
+    def stream_html(self) -> Iterator[str]:
+        """
+        Serialize this tree to HTML, matching the nodes `create` would build.
+        """
+        tag = self.tag.lower()
+        yield f"<{tag}{self.attributes_html()}>"
+        for child in self.children:
+            if is_dynamic(child):
                 value = child()
                 if inspect.isgenerator(value):
-                    self.render_generator(child, elem, value)
+                    for item in value:
+                        yield from item_html(item)
+                    yield "<!---->"
                 else:
-                    self.render_single(child, elem, value)
+                    yield from item_html(value)
+            elif isinstance(child, (Element, str, int, float)):
+                yield from item_html(child)
+        yield f"</{tag}>"
 
-        return elem
-
-    def render_single(self, child, elem, value):
-        res = elem.attach(value)
+    def render_single(self, child, elem, value, owner):
+        res = create_item(value)
+        elem.attach(res)
+        self.bind_single(child, elem, res, owner)
 
+    def bind_single(self, child, elem, res, owner):
         def rerender():
-            nonlocal res
-            if res != elem:
-                elem.remove(res)
-                res = elem.attach(child())
-            else:
-                elem.innerHTML = child()
+            nonlocal res, owner
+            with owned_by(Owner(owner.parent)) as new_owner:
+                value = child.evaluate()
+                if res.nodeType == TEXT_NODE and not isinstance(value, Element):
+                    res.textContent = str(value)
+                else:
+                    new = create_item(value)
+                    elem.replaceChild(new, res)
+                    res = new
+            owner.dispose()
+            owner = new_owner
 
         child.rerender = rerender
 
-    def render_generator(self, child, elem, value):
-        keys = []
-        for i, v in enumerate(value):
-            if isinstance(v, Element):
-                key = v.key or i
-                v.render(elem)
-                keys.append(str(key))
-            else:
-                elem.attach(v)
-                keys.append(str(i))
+    def render_generator(self, child, elem, pairs, owner):
+        anchor = document.createComment("")
+        elem.attach(anchor)
+        keys = item_keys(item for item, _ in pairs)
+        nodes = {}
+        owners = {}
+        for key, (item, item_owner) in zip(keys, pairs):
+            with owned_by(item_owner):
+                nodes[key] = create_item(item)
+            owners[key] = item_owner
+            elem.insertBefore(nodes[key], anchor)
+        self.bind_generator(child, elem, anchor, keys, nodes, owners, owner)
 
+    def hydrate_generator(self, child, elem, pairs, node, owner):
+        keys = item_keys(item for item, _ in pairs)
+        nodes = {}
+        owners = {}
+        for key, (item, item_owner) in zip(keys, pairs):
+            with owned_by(item_owner):
+                nodes[key] = hydrate_item(elem, item, node)
+            owners[key] = item_owner
+            node = nodes[key].nextSibling
+        self.bind_generator(child, elem, node, keys, nodes, owners, owner)
+        return node.nextSibling
+
+    def bind_generator(self, child, elem, anchor, keys, nodes, owners, owner):
         def rerender():
-            value = list(child())
-            while len(keys) > len(value):
-                keys.pop()
-            for i, v in enumerate(value):
-                if isinstance(v, Element):
-                    print("rerender element", keys, i, v.key)
-                    if i < len(keys):
-                        if str(v.key) != keys[i]:
-                            v.render(elem)
-                            keys[i] = str(v.key or i)
-                            print(f"setting key at {i=} to {keys[i]}")
-                        else:
-                            print("do nothing")
-                    else:
-                        v.render(elem)
-                        key = v.key or i
-                        print(f"adding elem {key=}")
-                        keys.append(str(key))
+            nonlocal keys
+            with owned_by(owner):
+                pairs = owned_items(child.evaluate())
+            new_keys = item_keys(item for item, _ in pairs)
+            kept = set(new_keys)
+            old_index = {}
+            for i, key in enumerate(keys):
+                if key in kept:
+                    old_index[key] = i
                 else:
-                    print("attach literal")
-                    elem.attach(v)
+                    elem.remove(nodes.pop(key))
+                    owners.pop(key).dispose()
+
+            sources = [old_index.get(key, -1) for key in new_keys]
+            stable = longest_increasing_subsequence(sources)
+            before = anchor
+            for i in reversed(range(len(new_keys))):
+                key = new_keys[i]
+                item, item_owner = pairs[i]
+                if sources[i] == -1:
+                    with owned_by(item_owner):
+                        nodes[key] = create_item(item)
+                    owners[key] = item_owner
+                    elem.insertBefore(nodes[key], before)
+                else:
+                    item_owner.dispose()
+                    if i not in stable:
+                        elem.insertBefore(nodes[key], before)
+                before = nodes[key]
+            keys = new_keys
 
         child.rerender = rerender
 
 
+class Static(Element):
+    """
+    A subtree without signals or event handlers, hoisted out of a component
+    by the compiler. It is built once into a template that every render
+    clones.
+    """
+
+    __slots__ = ("element", "template")
+
+    def __init__(self, element: Element):
+        self.set(
+            children=element.children,
+            styles=element.styles,
+            cls=element.cls,
+            attrs=element.attrs,
+            key=element.key,
+            element=element,
+            template=None,
+        )
+
+    def __call__(self, **kwargs):
+        return self.element(**kwargs)
+
+    def __getitem__(self, item):
+        return self.element[item]
+
+    def hoist(self):
+        return self
+
+    def create(self) -> DOMNode:
+        if self.template is None:
+            self.set(template=self.element.create())
+        return self.template.cloneNode(True)
+
+    def hydrate(self, elem: DOMNode) -> DOMNode:
+        return elem
+
+    def stream_html(self) -> Iterator[str]:
+        return self.element.stream_html()
+
+
+def stream_html(element: Element, chunk_size: int = 8192) -> Iterator[str]:
+    """
+    Serialize `element` in chunks of roughly `chunk_size` characters, so the
+    start of a large page can be sent before the rest has been rendered.
+    """
+    parts = []
+    size = 0
+    for part in element.stream_html():
+        parts.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield "".join(parts)
+            parts.clear()
+            size = 0
+    if parts:
+        yield "".join(parts)
+
+
+def item_keys(items) -> list:
+    """
+    Key generator items by their `key`, falling back to the element itself
+    for unkeyed elements, which only matches an unchanged static one, and to
+    their text for literals.
+    """
+    keys = []
+    seen = set()
+    for i, v in enumerate(items):
+        if isinstance(v, Element):
+            key = ("key", v.key) if v.key else ("element", v)
+        else:
+            key = ("text", str(v))
+        while key in seen:
+            key += (i,)
+        seen.add(key)
+        keys.append(key)
+    return keys
+
+
+def is_items(value) -> bool:
+    return isinstance(value, Owned) or inspect.isgenerator(value)
+
+
+def owned_items(value) -> Owned:
+    return value if isinstance(value, Owned) else own_each(value)
+
+
+def is_dynamic(child) -> bool:
+    """
+    If `child` is a signal or a function, such as one calling a helper the
+    compiler could not see into, to be tracked at runtime.
+    """
+    return isinstance(child, ReadSignal) or (
+        callable(child) and not isinstance(child, Element)
+    )
+
+
+def as_synthetic(child: ReadSignal | Callable) -> SyntheticSignal:
+    if isinstance(child, SyntheticSignal):
+        return child
+    if not isinstance(child, ReadSignal):
+        line_from = getattr(child, "__qualname__", None) or repr(child)
+        return SyntheticSignal.new(child, line_from=line_from)
+    return SyntheticSignal.new(child, child, line_from=child.line_from)
+
+
+def create_item(item) -> DOMNode:
+    if isinstance(item, Element):
+        return item.create()
+    return document.createTextNode(str(item))
+
+
+def hydrate_item(elem: DOMNode, item, node) -> DOMNode:
+    """
+    Adopt the server-rendered node for `item`. Adjacent texts are merged
+    into one node by the HTML parser, so split off the part that is ours.
+    """
+    if isinstance(item, Element):
+        return item.hydrate(node)
+    text = str(item)
+    if not text or node is None or node.nodeType != TEXT_NODE:
+        new = document.createTextNode(text)
+        elem.insertBefore(new, node)
+        return new
+    if len(node.textContent) > len(text):
+        node.splitText(len(text))
+    return node
+
+
+def item_html(item) -> Iterator[str]:
+    if isinstance(item, Element):
+        yield from item.stream_html()
+    else:
+        yield escape(str(item))
+
+
+def to_css(name: str) -> str:
+    """`backgroundColor` -> `background-color`."""
+    if "-" in name:
+        return name
+    return "-".join(part.lower() for part in to_css_re.findall(name))
+
+
+def is_reactive(value) -> bool:
+    if isinstance(value, dict):
+        return any(is_reactive(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return any(is_reactive(v) for v in value)
+    return callable(value)
+
+
+def resolve(value):
+    """`value` with every signal or function in it called, recursively."""
+    if isinstance(value, dict):
+        return {k: resolve(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [resolve(v) for v in value]
+    if callable(value):
+        return resolve(value())
+    return value
+
+
+def class_names(value) -> str:
+    if isinstance(value, dict):
+        return " ".join(name for name, on in value.items() if on)
+    if isinstance(value, list):
+        return " ".join(filter(None, (class_names(v) for v in value)))
+    if value is None or value is False:
+        return ""
+    return str(value)
+
+
+def style_properties(value) -> dict[str, str]:
+    if isinstance(value, str):
+        properties = {}
+        for declaration in value.split(";"):
+            name, _, v = declaration.partition(":")
+            if name.strip():
+                properties[name.strip()] = v.strip()
+        return properties
+    if isinstance(value, dict):
+        return {
+            to_css(name): str(v)
+            for name, v in value.items()
+            if v is not None and v is not False
+        }
+    return {}
+
+
+def style_text(properties: dict[str, str]) -> str:
+    return "; ".join(f"{name}: {value}" for name, value in properties.items())
+
+
+def attribute_value(name: str, value):
+    """
+    What `value` sets for attribute `name`: a dict of CSS properties for
+    `style`, otherwise a string or None to remove it.
+    """
+    if name == "style":
+        return style_properties(value)
+    if name == "class":
+        return class_names(value) or None
+    if value is None or value is False:
+        return None
+    if value is True:
+        return ""
+    return str(value)
+
+
+def patch_attribute(elem: DOMNode, name: str, old, new):
+    if name == "style":
+        old = old or {}
+        for prop in old.keys() - new.keys():
+            elem.style.removeProperty(prop)
+        for prop, value in new.items():
+            if old.get(prop) != value:
+                elem.style.setProperty(prop, value)
+    elif new != old:
+        if new is None:
+            elem.removeAttribute(name)
+        else:
+            elem.setAttribute(name, new)
+
+
+def bind_attribute(elem: DOMNode, name: str, value, hydrating: bool):
+    binding = SyntheticSignal.new(
+        lambda: attribute_value(name, resolve(value)),
+        line_from=getattr(value, "line_from", None) or f"{name} attribute",
+    )
+    current = binding.evaluate()
+    if not hydrating:
+        patch_attribute(elem, name, None, current)
+
+    def rerender():
+        nonlocal current
+        new = binding.evaluate()
+        patch_attribute(elem, name, current, new)
+        current = new
+
+    binding.rerender = rerender
+
+
+class Delegator:
+    """
+    Event handlers, kept in a table by node id instead of bound to their
+    nodes. Each root, the parent a tree is mounted or rendered into, gets
+    one listener per event type, which walks up from the event's target
+    calling the handlers it finds, in a batch. A node's handlers are
+    released with the owner that rendered it.
+
+    Events that do not bubble are still bound on their node.
+    """
+
+    ATTRIBUTE = "data-fez-on"
+    NOT_BUBBLING = {"blur", "focus", "load", "mouseenter", "mouseleave", "scroll"}
+
+    def __init__(self):
+        self.roots: list[DOMNode] = []
+        self.types: set[str] = set()
+        self.handlers: dict[str, dict[str, object]] = {}
+        self.next_id = 0
+
+    def listen(self, root: DOMNode):
+        if root in self.roots:
+            return
+        self.roots.append(root)
+        for type in self.types:
+            root.bind(type, self.dispatch)
+
+    def cover(self, parent: DOMNode):
+        """Listen on `parent`, unless it is inside a root already."""
+        node = parent
+        while node is not None:
+            if node in self.roots:
+                return
+            node = node.parentNode
+        self.listen(parent)
+
+    def on(self, elem: DOMNode, attrs: dict[str, object]):
+        """
+        Register the `on_` entries of an element's `attrs`. A node gets an id
+        only if one of them is delegated, and the table keeps `attrs` itself.
+        """
+        delegated = False
+        for name, handler in attrs.items():
+            if name[:3] != "on_":
+                continue
+            type = name[3:]
+            if type in self.NOT_BUBBLING:
+                handler = batched(handler)
+                elem.bind(type, handler)
+                on_cleanup(lambda t=type, h=handler: elem.unbind(t, h))
+                continue
+            delegated = True
+            if type not in self.types:
+                self.types.add(type)
+                for root in self.roots:
+                    root.bind(type, self.dispatch)
+        if not delegated:
+            return
+
+        id = str(self.next_id)
+        self.next_id += 1
+        elem.setAttribute(self.ATTRIBUTE, id)
+        self.handlers[id] = attrs
+        on_cleanup(lambda: self.handlers.pop(id, None))
+
+    def dispatch(self, event):
+        root = event.currentTarget
+        path = []
+        node = event.target
+        while node is not None and node != root:
+            if node in self.roots:
+                # the listener on this nearer root handled what is below it
+                path.clear()
+            elif node.nodeType == 1:
+                path.append(node)
+            node = node.parentNode
+
+        with batch():
+            for node in path:
+                handlers = self.handlers.get(node.getAttribute(self.ATTRIBUTE))
+                handler = handlers and handlers.get("on_" + event.type)
+                if handler is not None:
+                    handler(event)
+                    if event.cancelBubble:
+                        break
+
+
+events = Delegator()
+
+
+def mount(component: Callable[[], "Element"], root: DOMNode, state_id="fez-state"):
+    """
+    Hydrate the server-rendered markup in `root`, resuming signals from the
+    embedded state, or render from scratch if there is none.
+    """
+    events.listen(root)
+    state = document.getElementById(state_id)
+    if state is not None and root.firstChild is not None:
+        with resume_signals(json.loads(state.textContent)):
+            element = component()
+            if isinstance(element, ReadSignal):
+                return Element()[element].hydrate(root)
+            return element.hydrate(root.firstChild)
+    root.clear()
+    element = component()
+    if isinstance(element, ReadSignal):
+        # a hot-reloadable component renders as a signal, without a node
+        return Element()[element].render_children(root)
+    return element.render(root)
+
+
+def state_script(signals: list[ReadSignal], state_id="fez-state") -> str:
+    state = json.dumps(dump_signals(signals)).replace("</", "<\\/")
+    return f'<script type="application/json" id="{state_id}">{state}</script>'
+
+
+def longest_increasing_subsequence(sources: list[int]) -> set[int]:
+    """
+    Positions of the longest run of `sources` that is already in increasing
+    order, skipping -1. Those nodes can stay where they are; everything
+    else has to move.
+    """
+    tails = []
+    tail_positions = []
+    previous = [-1] * len(sources)
+    for i, source in enumerate(sources):
+        if source == -1:
+            continue
+        j = bisect.bisect_left(tails, source)
+        if j:
+            previous[i] = tail_positions[j - 1]
+        if j == len(tails):
+            tails.append(source)
+            tail_positions.append(i)
+        else:
+            tails[j] = source
+            tail_positions[j] = i
+
+    result = set()
+    i = tail_positions[-1] if tail_positions else -1
+    while i != -1:
+        result.add(i)
+        i = previous[i]
+    return result
+
+
 class H1(Element, tag="h1"):
     pass
 
@@ -177,19 +740,308 @@ class SPAN(Element, tag="span"):
 
 
 class BUTTON(Element, tag="button"):
+    def __call__(self, on_click: Callable, **kwargs):
+        return super().__call__(on_click=on_click, **kwargs)
+
+
+class VIRTUAL_LIST(Element, tag="div"):
+    """
+    A scrolling viewport over `items`: a list signal, or a function returning
+    a sequence or a generator. `row(item, index)` renders one item.
+
+    Only the rows in view, plus `overscan` on each side, are in the DOM, and
+    row nodes that scroll out are reused for rows that scroll in. Rows are
+    `row_height` pixels high, or measured once rendered when it is None,
+    starting from `estimated_row_height`. A generator is only advanced as far
+    as the window has scrolled.
+    """
+
+    __slots__ = (
+        "items",
+        "row",
+        "height",
+        "row_height",
+        "estimated_row_height",
+        "overscan",
+    )
+
     def __init__(self):
         super().__init__()
-        self.on_click = None
+        self.set(
+            items=(),
+            row=None,
+            height=0,
+            row_height=None,
+            estimated_row_height=24,
+            overscan=3,
+        )
 
-    def __call__(self, on_click: Callable, **kwargs):
+    def __call__(
+        self,
+        items,
+        row: Callable[[object, int], Renderable],
+        height: int,
+        row_height: int | None = None,
+        estimated_row_height: int = 24,
+        overscan: int = 3,
+        **kwargs,
+    ):
         new = super().__call__(**kwargs)
-        new.on_click = on_click
+        new.set(
+            items=items,
+            row=row,
+            height=height,
+            row_height=row_height,
+            estimated_row_height=estimated_row_height,
+            overscan=overscan,
+        )
         return new
 
-    def render(self, parent: Elem):
-        ref = super().render(parent)
-        if self.on_click:
-            ref.bind("click", self.on_click)
+    def create(self) -> DOMNode:
+        elem = getattr(html, self.tag)()
+        self.bind_attributes(elem)
+        VirtualWindow(self, elem)
+        return elem
+
+    def hydrate(self, elem: DOMNode) -> DOMNode:
+        self.bind_attributes(elem, hydrating=True)
+        elem.clear()
+        VirtualWindow(self, elem)
+        return elem
+
+    def stream_html(self) -> Iterator[str]:
+        tag = self.tag.lower()
+        yield f"<{tag}{self.attributes_html()}></{tag}>"
+
+    def attributes(self) -> Iterator[tuple[str, object]]:
+        for name, value in super().attributes():
+            if name != "style":
+                yield name, value
+        viewport = style_properties(self.viewport_style())
+        styles = self.styles
+        if is_reactive(styles):
+            yield "style", lambda: viewport | style_properties(resolve(styles))
+        else:
+            yield "style", viewport | style_properties(styles)
+
+    def viewport_style(self) -> str:
+        return f"height:{self.height}px;overflow-y:auto"
+
+
+class RowHeights:
+    """
+    Row offsets: an estimate per row, plus corrections for measured rows in
+    a Fenwick tree, so finding or changing an offset is O(log rows). The
+    tree is only built once a row is measured.
+    """
+
+    def __init__(self, estimate: float):
+        self.estimate = estimate
+        self.rows = 0
+        self.tree = [0.0]
+        self.measured: dict[int, float] = {}
+
+    def __len__(self):
+        return self.rows
+
+    def resize(self, rows: int):
+        self.rows = rows
+        if not self.measured:
+            self.tree = [0.0]
+        elif rows < len(self.tree) - 1:
+            del self.tree[rows + 1 :]
+            for i in [i for i in self.measured if i >= rows]:
+                del self.measured[i]
+        else:
+            while len(self.tree) <= rows:
+                j = len(self.tree)
+                self.tree.append(self.prefix(j - 1) - self.prefix(j - (j & -j)))
+
+    def set(self, i: int, height: float):
+        delta = height - self.estimate
+        change = delta - self.measured.get(i, 0.0)
+        if not change:
+            return
+        if not self.measured:
+            self.tree = [0.0] * (self.rows + 1)
+        self.measured[i] = delta
+        j = i + 1
+        while j < len(self.tree):
+            self.tree[j] += change
+            j += j & -j
+
+    def prefix(self, i: int) -> float:
+        total = 0.0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def offset(self, i: int) -> float:
+        """Top of row `i`, or the total height for `i == len(self)`."""
+        if not self.measured:
+            return i * self.estimate
+        return i * self.estimate + self.prefix(i)
+
+    def index_at(self, y: float) -> int:
+        """The row at `y` pixels from the top."""
+        if not self.measured:
+            i = int(y // self.estimate) if y > 0 else 0
+        else:
+            i = 0
+            top = 0.0
+            step = 1 << self.rows.bit_length()
+            while step:
+                j = i + step
+                size = self.tree[j] + step * self.estimate if j <= self.rows else 0
+                if j <= self.rows and top + size <= y:
+                    i = j
+                    top += size
+                step >>= 1
+        return min(i, max(self.rows - 1, 0))
+
+
+class LazyItems:
+    """
+    A generator's items, pulled only as far as they are needed, inside the
+    source's tracking so the signals they read stay subscribed.
+    """
+
+    def __init__(self, items, source: SyntheticSignal, reads: set):
+        self.items = []
+        self.rest = iter(items)
+        self.done = False
+        self.source = source
+        self.reads = reads
+
+    def __len__(self):
+        return len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def fetch(self, count: int):
+        with self.source.tracking(self.reads):
+            while not self.done and len(self.items) < count:
+                try:
+                    self.items.append(next(self.rest))
+                except StopIteration:
+                    self.done = True
+
+
+class VirtualWindow:
+    """
+    The live state of one rendered `VIRTUAL_LIST`: the visible rows, by
+    index, each in a positioned slot node with the owner of its contents.
+    """
+
+    def __init__(self, spec: VIRTUAL_LIST, viewport: DOMNode):
+        self.spec = spec
+        self.viewport = viewport
+        self.owner = current_owner()
+        self.heights = RowHeights(spec.row_height or spec.estimated_row_height)
+        self.slots: dict[int, tuple[DOMNode, Owner, object]] = {}
+        self.free: list[DOMNode] = []
+        self.items = ()
+
+        self.spacer = html.DIV()
+        viewport.attach(self.spacer)
+
+        items = spec.items
+        if isinstance(items, ReadSignal):
+            self.source = as_synthetic(items)
+        elif callable(items):
+            self.source = SyntheticSignal.new(items, line_from="virtual list")
+        else:
+            self.source = SyntheticSignal.new(lambda: items, line_from="virtual list")
+        self.source.rerender = self.reload
+        self.reload()
+
+        viewport.bind("scroll", self.scrolled)
+        on_cleanup(self.release)
+
+    def reload(self):
+        reads = set()
+        with self.source.tracking(reads):
+            items = self.source()
+        if hasattr(items, "__getitem__") and hasattr(items, "__len__"):
+            self.items = items
+        else:
+            self.items = LazyItems(items, self.source, reads)
+        self.update()
+
+    def scrolled(self, event=None):
+        self.update()
+
+    def update(self):
+        spec = self.spec
+        top = getattr(self.viewport, "scrollTop", 0) or 0
+        if isinstance(self.items, LazyItems):
+            rows = max(len(self.items), 1)
+            self.heights.resize(rows)
+            end = self.heights.index_at(top + spec.height) + 1 + spec.overscan
+            self.items.fetch(end + spec.overscan)
+        self.heights.resize(len(self.items))
+
+        first = max(self.heights.index_at(top) - spec.overscan, 0)
+        last = min(
+            self.heights.index_at(top + spec.height) + 1 + spec.overscan,
+            len(self.items),
+        )
+
+        for i in [i for i in self.slots if not first <= i < last]:
+            node, owner, _ = self.slots.pop(i)
+            owner.dispose()
+            self.free.append(node)
+
+        rendered = []
+        for i in range(first, last):
+            item = self.items[i]
+            slot = self.slots.get(i)
+            if slot is not None and slot[2] is item:
+                continue
+            node = slot[0] if slot is not None else None
+            if slot is not None:
+                slot[1].dispose()
+            elif self.free:
+                node = self.free.pop()
+                if node.parentNode is None:
+                    self.spacer.attach(node)
+            else:
+                node = self.spacer.attach(html.DIV())
+            with owned_by(Owner(self.owner)) as owner:
+                content = create_item(spec.row(item, i))
+            node.clear()
+            node.attach(content)
+            self.slots[i] = (node, owner, item)
+            rendered.append(i)
+
+        for node in self.free:
+            if node.parentNode is not None:
+                self.spacer.remove(node)
+
+        if spec.row_height is None:
+            for i in rendered:
+                height = getattr(self.slots[i][0], "offsetHeight", 0)
+                if height:
+                    self.heights.set(i, height)
+
+        for i, (node, _, _) in self.slots.items():
+            node.setAttribute(
+                "style",
+                f"position:absolute;left:0;right:0;top:{self.heights.offset(i)}px",
+            )
+        total = self.heights.offset(len(self.heights))
+        if isinstance(self.items, LazyItems) and not self.items.done:
+            total += spec.overscan * self.heights.estimate
+        self.spacer.setAttribute("style", f"position:relative;height:{total}px")
+
+    def release(self):
+        self.viewport.unbind("scroll", self.scrolled)
+        self.source.destroy()
+        for _, owner, _ in self.slots.values():
+            owner.dispose()
+        self.slots.clear()
 
 
 h1 = H1()
@@ -201,6 +1053,7 @@ body = BODY()
 div = DIV()
 span = SPAN()
 button = BUTTON()
+virtual_list = VIRTUAL_LIST()
 
 
 @component
@@ -1,9 +1,33 @@
 import copy
+import hashlib
 import inspect
+import json
+import linecache
+import marshal
+import os
+import sys
 import ast
 
+import rw_signal
 from rw_signal import signal as SIGNALIS, ReadSignal
 
+try:
+    from browser import local_storage
+except ImportError:
+    local_storage = None
+
+
+# part of every cache key and build manifest: bump it whenever the compiled
+# output changes, or stale modules keep being served from the caches
+COMPILER_VERSION = "8"
+CACHE_DIR = "__fezcache__"
+
+
+def source_hash(source: str | bytes) -> str:
+    if isinstance(source, str):
+        source = source.encode()
+    return hashlib.sha256(COMPILER_VERSION.encode() + b"\0" + source).hexdigest()
+
 
 def get_line_info(node: ast.stmt):
     return {
@@ -15,19 +39,36 @@ def get_line_info(node: ast.stmt):
 
 
 class Visitor(ast.NodeTransformer):
-    def __init__(self, signal_func_name, signals_locals: dict[str, type]):
+    def __init__(
+        self,
+        signal_func_name,
+        signals_locals: dict[str, type],
+        source_map: list[str] | None = None,
+    ):
         self.signal_func_name = signal_func_name
         self.signals_locals = signals_locals
+        self.source_map = source_map
         self.signal_references: set[str] = set()
         self.inner_defined_functions: set[str] = set()
 
+    def line_from(self, text: str, line_info: dict) -> ast.Constant:
+        """
+        `text` in debug builds. In release builds, its index in the source map.
+        """
+        if self.source_map is None:
+            return ast.Constant(text, **line_info)
+        self.source_map.append(text)
+        return ast.Constant(len(self.source_map) - 1, **line_info)
+
     def visit_Name(self, node: ast.Name):
         if isinstance(node.ctx, ast.Load) and node.id in self.signals_locals:
             self.signal_references.add(node.id)
         return node
 
     def visit_Lambda(self, node: ast.Lambda):
-        visitor = Visitor(self.signal_func_name, self.signals_locals.copy())
+        visitor = Visitor(
+            self.signal_func_name, self.signals_locals.copy(), self.source_map
+        )
         refs = set()
         new_body = visitor.visit(node.body)
         if visitor.signal_references.difference(refs):
@@ -56,9 +97,8 @@ class Visitor(ast.NodeTransformer):
                     keywords=[
                         ast.keyword(
                             "line_from",
-                            value=ast.Constant(
-                                f"Line {node.lineno} - {ast.unparse(node)}",
-                                **line_info,
+                            value=self.line_from(
+                                f"Line {node.lineno} - {ast.unparse(node)}", line_info
                             ),
                             **line_info,
                         ),
@@ -71,7 +111,9 @@ class Visitor(ast.NodeTransformer):
     def visit_FunctionDef(self, node: ast.FunctionDef):
         self.inner_defined_functions.add(node.name)
 
-        visitor = Visitor(self.signal_func_name, self.signals_locals.copy())
+        visitor = Visitor(
+            self.signal_func_name, self.signals_locals.copy(), self.source_map
+        )
         new_body = []
         refs = set()
         for item in node.body:
@@ -84,36 +126,50 @@ class Visitor(ast.NodeTransformer):
         line_info = get_line_info(node)
         refs.difference_update(visitor.inner_defined_functions)
 
-        if refs:
-            self.signals_locals[node.name] = node
-            new_node.decorator_list += [
-                ast.Call(
-                    func=ast.Attribute(
-                        value=ast.Name(
-                            self.signal_func_name, ctx=ast.Load(), **line_info
-                        ),
-                        attr="func",
-                        ctx=ast.Load(),
-                        **line_info,
+        decorator = ast.Call(
+            func=ast.Attribute(
+                value=ast.Name(self.signal_func_name, ctx=ast.Load(), **line_info),
+                attr="func",
+                ctx=ast.Load(),
+                **line_info,
+            ),
+            args=[ast.Name(id=ref, ctx=ast.Load(), **line_info) for ref in refs],
+            keywords=[
+                ast.keyword(
+                    arg="line_from",
+                    value=self.line_from(
+                        f"Line {node.lineno} - def {node.name}", line_info
                     ),
-                    args=[
-                        ast.Name(id=ref, ctx=ast.Load(), **line_info) for ref in refs
-                    ],
-                    keywords=[
-                        ast.keyword(
-                            arg="line_from",
-                            value=ast.Constant(
-                                f"Line {node.lineno} - def {node.name}",
-                                **line_info,
-                            ),
-                            **line_info,
-                        ),
-                    ],
-                )
-            ]
+                    **line_info,
+                ),
+            ],
+        )
+
+        computed = [
+            i
+            for i, deco in enumerate(node.decorator_list)
+            if self.is_computed_decorator(deco)
+        ]
+        if computed:
+            self.signals_locals[node.name] = node
+            decorator.func.attr = "computed"
+            new_node.decorator_list = node.decorator_list.copy()
+            for i in computed:
+                new_node.decorator_list[i] = decorator
+        elif refs:
+            self.signals_locals[node.name] = node
+            new_node.decorator_list = node.decorator_list + [decorator]
 
         return new_node
 
+    def is_computed_decorator(self, node: ast.expr):
+        match node:
+            case ast.Attribute(value=ast.Name(id=id), attr="computed") | ast.Call(
+                func=ast.Attribute(value=ast.Name(id=id), attr="computed")
+            ) if (id == self.signal_func_name):
+                return True
+        return False
+
     def visit_For(self, node: ast.For):
         match node.target, node.iter:
             case ast.Tuple(
@@ -150,11 +206,41 @@ class Visitor(ast.NodeTransformer):
                     func=node.value.func,
                     args=node.value.args,
                     keywords=[
+                        *without_line_from(node.value.keywords),
                         ast.keyword(
                             "line_from",
-                            value=ast.Constant(
-                                f"Line {node.lineno} - {ast.unparse(node)}",
-                                **line_info,
+                            value=self.line_from(
+                                f"Line {node.lineno} - {ast.unparse(node)}", line_info
+                            ),
+                            **line_info,
+                        ),
+                    ],
+                )
+                return new_node
+            case ast.Assign(
+                targets=[ast.Name(id=read)],
+                value=ast.Call(
+                    func=ast.Attribute(
+                        value=ast.Name(id=func_id),
+                        attr="resource" | "selector" | "store",
+                    )
+                ),
+            ) if (
+                func_id == self.signal_func_name
+            ):
+                self.signals_locals[read] = ReadSignal
+
+                new_node = copy.copy(node)
+                line_info = get_line_info(node)
+                new_node.value = ast.Call(
+                    func=node.value.func,
+                    args=node.value.args,
+                    keywords=[
+                        *without_line_from(node.value.keywords),
+                        ast.keyword(
+                            "line_from",
+                            value=self.line_from(
+                                f"Line {node.lineno} - {ast.unparse(node)}", line_info
                             ),
                             **line_info,
                         ),
@@ -177,11 +263,11 @@ class Visitor(ast.NodeTransformer):
                 new_node = copy.copy(node)
                 line_info = get_line_info(node)
                 new_node.keywords = [
+                    *without_line_from(node.keywords),
                     ast.keyword(
                         "line_from",
-                        value=ast.Constant(
-                            f"Line {node.lineno} - {ast.unparse(node)}",
-                            **line_info,
+                        value=self.line_from(
+                            f"Line {node.lineno} - {ast.unparse(node)}", line_info
                         ),
                         **line_info,
                     ),
@@ -190,44 +276,305 @@ class Visitor(ast.NodeTransformer):
         return self.generic_visit(node)
 
 
-def visitor(signal_func_name, node: ast.stmt):
+def without_line_from(keywords: list[ast.keyword]) -> list[ast.keyword]:
+    return [k for k in keywords if k.arg != "line_from"]
+
+
+class StaticHoister(ast.NodeTransformer):
+    """
+    Replace element expressions that reference no local names, such as
+    `h1(style={...})["Title"]`, with module-level constants. They are
+    rendered by cloning a template instead of node by node.
+    """
+
+    def __init__(self, prefix: str, element_names: set[str], local_names: set[str]):
+        self.prefix = prefix
+        self.element_names = element_names - local_names
+        self.hoisted: list[ast.stmt] = []
+
+    def visit(self, node):
+        if isinstance(node, ast.Subscript) and self.is_static(node):
+            name = f"{self.prefix}{len(self.hoisted)}"
+            self.hoisted.append(
+                ast.Assign(
+                    targets=[ast.Name(name, ctx=ast.Store())],
+                    value=ast.Call(
+                        func=ast.Attribute(value=node, attr="hoist", ctx=ast.Load()),
+                        args=[],
+                        keywords=[],
+                    ),
+                    lineno=node.lineno,
+                )
+            )
+            return ast.Name(name, ctx=ast.Load(), **get_line_info(node))
+        return super().visit(node)
+
+    def is_static(self, node: ast.expr) -> bool:
+        match node:
+            case ast.Name(id=id, ctx=ast.Load()):
+                return id in self.element_names
+            case ast.Call(func=func, args=[], keywords=keywords):
+                return self.is_static(func) and all(
+                    k.arg is not None and is_literal(k.value) for k in keywords
+                )
+            case ast.Subscript(value=value, slice=ast.Tuple(elts=children)) | (
+                ast.Subscript(value=value, slice=children)
+            ) if isinstance(node.ctx, ast.Load):
+                if not isinstance(children, list):
+                    children = [children]
+                return self.is_static(value) and all(
+                    self.is_static(child)
+                    or isinstance(child, ast.Constant)
+                    and isinstance(child.value, (str, int, float))
+                    for child in children
+                )
+        return False
+
+
+class BuildLowering(ast.NodeTransformer):
+    """
+    Lower `div(cls=...)[children]` to `div.build(children, cls=...)`, which
+    copies the element once instead of once for the call and once for the
+    subscript.
+    """
+
+    def __init__(self, element_names: set[str]):
+        self.element_names = element_names
+
+    def visit_Subscript(self, node: ast.Subscript):
+        self.generic_visit(node)
+        match node:
+            case ast.Subscript(
+                value=ast.Call(func=ast.Name(id=id) as func, args=args),
+                slice=children,
+                ctx=ast.Load(),
+            ) if id in self.element_names:
+                return ast.Call(
+                    func=ast.Attribute(func, "build", ast.Load()),
+                    args=[children, *args],
+                    keywords=node.value.keywords,
+                    **get_line_info(node),
+                )
+        return node
+
+
+def is_literal(node: ast.expr) -> bool:
+    try:
+        ast.literal_eval(node)
+    except ValueError:
+        return False
+    return True
+
+
+def local_names(node: ast.FunctionDef) -> set[str]:
+    names = set()
+    for child in ast.walk(node):
+        match child:
+            case ast.Name(id=id, ctx=ast.Store() | ast.Del()):
+                names.add(id)
+            case ast.arg(arg=arg):
+                names.add(arg)
+            case ast.FunctionDef(name=name) | ast.ClassDef(name=name):
+                names.add(name)
+            case ast.Import(names=aliases) | ast.ImportFrom(names=aliases):
+                names.update((a.asname or a.name).split(".")[0] for a in aliases)
+            case ast.Global(names=ids) | ast.Nonlocal(names=ids):
+                names.update(ids)
+    return names
+
+
+def visitor(
+    signal_func_name,
+    node: ast.stmt,
+    element_names: set[str] = frozenset(),
+    source_map: list[str] | None = None,
+) -> list[ast.stmt]:
 
     if not isinstance(node, ast.FunctionDef):
         raise TypeError()
 
-    visitor = Visitor(signal_func_name, {})
+    visitor = Visitor(signal_func_name, {}, source_map)
     new_body = []
     for item in node.body:
         new_body.append(visitor.visit(item))
     new_node = copy.copy(node)
     new_node.body = new_body
 
+    hoister = StaticHoister(
+        f"_fez_static_{node.name}_", set(element_names), local_names(node)
+    )
+    new_node.body = [hoister.visit(item) for item in new_body]
+    lowering = BuildLowering(set(element_names) - local_names(node))
+    new_node.body = [lowering.visit(item) for item in new_node.body]
+
     new_node.decorator_list = []
-    return new_node
+    return [*hoister.hoisted, new_node]
+
+
+class DiskCache:
+    """
+    Compiled components as marshalled `(version, source, code, source map)`
+    entries, in a `__fezcache__` directory next to the module that defines
+    them. An entry from another compiler version is a miss.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+
+    def path(self, fn, key: str) -> str:
+        directory = self.directory or os.path.join(
+            os.path.dirname(os.path.abspath(fn.__code__.co_filename)), CACHE_DIR
+        )
+        return os.path.join(
+            directory,
+            f"{key}.{sys.implementation.cache_tag}-v{COMPILER_VERSION}.fez",
+        )
+
+    def get(self, fn, key: str):
+        try:
+            with open(self.path(fn, key), "rb") as f:
+                entry = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if not (
+            isinstance(entry, tuple)
+            and len(entry) == 4
+            and entry[0] == COMPILER_VERSION
+        ):
+            return None
+        return entry[1:]
+
+    def set(self, fn, key: str, source: str, code, texts: list[str]):
+        path = self.path(fn, key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump((COMPILER_VERSION, source, code, texts), f)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+
+class StorageCache:
+    """
+    Compiled component source in the browser's local storage, under Brython,
+    as `[version, source, source map]` entries.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def get(self, fn, key: str):
+        try:
+            entry = json.loads(self.storage[self.item(key)])
+        except (KeyError, ValueError):
+            return None
+        if not (
+            isinstance(entry, list) and len(entry) == 3 and entry[0] == COMPILER_VERSION
+        ):
+            return None
+        return entry[1], None, entry[2]
+
+    def set(self, fn, key: str, source: str, code, texts: list[str]):
+        self.storage[self.item(key)] = json.dumps([COMPILER_VERSION, source, texts])
+
+    def item(self, key: str) -> str:
+        return f"fez:v{COMPILER_VERSION}:{key}"
+
+
+if local_storage is not None:
+    cache = StorageCache(local_storage.storage)
+else:
+    cache = DiskCache()
+
+# `line_from` texts by index, while compiling in release mode.
+source_map: list[str] | None = None
+
+
+def component_key(fn, signal_func_name: str, element_names: set[str]) -> str | None:
+    """
+    Identify the compiled output of `fn` without reading its source: the
+    hash of the file it is in, where it starts, the names it compiles
+    against and, in release mode, the first source map index it would use.
+    """
+    filename = fn.__code__.co_filename
+    lines = linecache.getlines(filename)
+    if not lines:
+        return None
+    file_hash = _file_hashes.get(filename)
+    if file_hash is None or file_hash[0] is not lines:
+        file_hash = _file_hashes[filename] = (lines, source_hash("".join(lines)))
+    return source_hash(
+        "\0".join(
+            [
+                file_hash[1],
+                fn.__qualname__,
+                str(fn.__code__.co_firstlineno),
+                signal_func_name,
+                "debug" if source_map is None else f"release {len(source_map)}",
+                *sorted(element_names),
+            ]
+        )
+    )
 
 
-def component(fn):
-    locals = inspect.currentframe().f_back.f_locals
+_file_hashes: dict[str, tuple[list[str], str]] = {}
+
 
+def compile_component(fn, signal_func_name: str, element_names: set[str]) -> str:
     source = inspect.getsource(fn)
     tree = ast.parse(source)
+    return ast.unparse(
+        ast.Module(
+            body=visitor(signal_func_name, tree.body[0], element_names, source_map),
+            type_ignores=[],
+        )
+    )
+
+
+def component(fn):
+    locals = inspect.currentframe().f_back.f_locals
 
     signal_func_name = ""
+    element_names = set()
     for k, v in locals.items():
         if v is SIGNALIS:
             signal_func_name = k
-
-    compiled = ast.unparse(visitor(signal_func_name, tree.body[0]))
-    exec(compiled, locals)
+        elif isinstance(getattr(v, "tag", None), str) and hasattr(v, "hoist"):
+            element_names.add(k)
+
+    key = component_key(fn, signal_func_name, element_names) if cache else None
+    cached = cache.get(fn, key) if key else None
+    if cached is not None:
+        compiled, code, texts = cached
+        if source_map is not None:
+            source_map.extend(texts)
+    else:
+        start = len(source_map) if source_map is not None else 0
+        compiled = compile_component(fn, signal_func_name, element_names)
+        texts = source_map[start:] if source_map is not None else []
+        code = None
+    if code is None:
+        code = compile(compiled, f"<component {fn.__qualname__}>", "exec")
+        if key and cached is None:
+            cache.set(fn, key, compiled, code, texts)
+
+    exec(code, locals)
     new_func = locals[fn.__name__]
     new_func.source = compiled
     return new_func
 
 
 class PrecompileComponentTransform(ast.NodeTransformer):
-    def __init__(self):
+    def __init__(self, source_map: list[str] | None = None, hot: bool = False):
+        self.source_map = source_map
+        self.hot = hot
+        self.components = 0
         self.import_component_as = "component"
         self.signal_func_name = "signal"
+        self.element_classes: set[str] = set()
+        self.element_names: set[str] = set()
 
     def visit_ImportFrom(self, node: ast.ImportFrom):
         match node.module, node.names:
@@ -238,17 +585,104 @@ class PrecompileComponentTransform(ast.NodeTransformer):
                 *_rest,
             ] if asname:
                 self.signal_func_name = asname
+            case "fez", names:
+                self.element_names.update(
+                    alias.asname or alias.name
+                    for alias in names
+                    if alias.name.islower()
+                )
+        return node
+
+    def visit_ClassDef(self, node: ast.ClassDef):
+        if any(k.arg == "tag" for k in node.keywords) or any(
+            isinstance(base, ast.Name) and base.id in self.element_classes
+            for base in node.bases
+        ):
+            self.element_classes.add(node.name)
+        return node
+
+    def visit_Assign(self, node: ast.Assign):
+        match node:
+            case ast.Assign(
+                targets=[ast.Name(id=name)],
+                value=ast.Call(func=ast.Name(id=cls), args=[], keywords=[]),
+            ) if (cls in self.element_classes):
+                self.element_names.add(name)
         return node
 
     def visit_FunctionDef(self, node: ast.FunctionDef):
         for i, deco in enumerate(node.decorator_list):
             match deco:
                 case ast.Name(id=id) if id == self.import_component_as:
-                    return visitor(self.signal_func_name, node)
+                    compiled = visitor(
+                        self.signal_func_name,
+                        node,
+                        self.element_names,
+                        self.source_map,
+                    )
+                    self.components += 1
+                    if self.hot:
+                        compiled[-1].decorator_list = [
+                            ast.Name("_fez_hot", ctx=ast.Load(), **get_line_info(node))
+                        ]
+                    return compiled
         return node
 
 
-def precompile_module(module_source: str):
+class StripDebug(ast.NodeTransformer):
+    """
+    Drop `if DEBUG:` blocks, keeping their `else`.
+    """
+
+    def visit_If(self, node: ast.If):
+        node = self.generic_visit(node)
+        match node.test:
+            case ast.Name(id="DEBUG"):
+                return node.orelse or ast.Pass()
+        return node
+
+
+def precompile_module(
+    module_source: str, source_map: list[str] | None = None, hot: bool = False
+):
+    """
+    Compile every `@component` in a module. Given a `source_map`, compile in
+    release mode: each `line_from` becomes an index into `source_map` and
+    `if DEBUG:` blocks are removed. With `hot`, components are registered
+    for hot reload.
+    """
     tree = ast.parse(module_source)
-    compiled = PrecompileComponentTransform().visit(tree)
+    transform = PrecompileComponentTransform(source_map, hot)
+    compiled = transform.visit(tree)
+    if source_map is not None:
+        compiled = StripDebug().visit(compiled)
+    if hot and transform.components:
+        compiled.body.insert(
+            future_imports_end(compiled),
+            ast.ImportFrom(
+                "hot", [ast.alias("register", "_fez_hot")], level=0, lineno=0
+            ),
+        )
     return ast.unparse(compiled)
+
+
+def future_imports_end(module: ast.Module) -> int:
+    """Index after the module docstring and `from __future__` imports."""
+    for i, node in enumerate(module.body):
+        match node:
+            case ast.Expr(value=ast.Constant(value=str())) if i == 0:
+                continue
+            case ast.ImportFrom(module="__future__"):
+                continue
+        return i
+    return len(module.body)
+
+
+def release():
+    """
+    Compile components imported from now on in release mode, and turn off
+    debug logging.
+    """
+    global source_map
+    source_map = []
+    rw_signal.DEBUG = False
@@ -0,0 +1,184 @@
+"""
+Hot module reload against the dev server in main.py. A changed module is
+re-run in place; the @component functions it redefines are swapped in,
+re-rendering only their subtrees and keeping their signals' values.
+
+    if getattr(window, "FEZ_DEV", False):
+        import hot
+        hot.connect()
+    mount(main, document["root"])
+
+`FEZ_DEV` is set by the pages main.py renders while it serves sources, so
+a built app never tries to reach the reload endpoint.
+"""
+
+import functools
+import json
+import linecache
+import sys
+import time
+from contextlib import nullcontext
+
+from rw_signal import (
+    ReadSignal,
+    SyntheticSignal,
+    batch,
+    current_owner,
+    resume_signals,
+    signal,
+    untracked,
+)
+
+RELOAD_PATH = "/__fez/hot"
+
+enabled = False
+components: dict[str, "HotComponent"] = {}
+_rendering: list["Instance"] = []
+
+
+class HotComponent:
+    """
+    A swappable component. Until `connect` is called it just calls through;
+    after that each call renders as a signal that re-runs when the component
+    is swapped.
+    """
+
+    def __init__(self, fn):
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.fingerprint = fingerprint(fn)
+        self.version, self.set_version = signal(0)
+
+    def __call__(self, *args, **kwargs):
+        if not enabled:
+            return self.fn(*args, **kwargs)
+
+        instance = Instance(self, args, kwargs)
+        if _rendering:
+            _rendering[-1].adopt(instance)
+        return SyntheticSignal.new(
+            instance.render, self.version, line_from=self.__qualname__
+        )
+
+    def swap(self, fn):
+        new = fingerprint(fn)
+        if new == self.fingerprint:
+            return
+        functools.update_wrapper(self, fn)
+        self.fn = fn
+        self.fingerprint = new
+        self.set_version(self.version.v.proxied_item + 1)
+
+
+class Instance:
+    """
+    One rendered use of a component. A re-render resumes the signals the
+    previous run created, and hands the components it calls the state of
+    the ones it called last time, matched by component and call order.
+    """
+
+    def __init__(self, component: HotComponent, args, kwargs):
+        self.component = component
+        self.args = args
+        self.kwargs = kwargs
+        self.state: list[ReadSignal] | None = None
+        self.children: list[Instance] = []
+        self.previous: list[Instance] = []
+
+    def adopt(self, child: "Instance"):
+        for i, old in enumerate(self.previous):
+            if old.component is child.component:
+                del self.previous[i]
+                child.state, child.children = old.state, old.children
+                break
+        self.children.append(child)
+
+    def render(self):
+        self.component.version()
+        owner = current_owner()
+        start = len(owner.signals) if owner is not None else 0
+        resumed = (
+            resume_signals([[s.v.proxied_item] for s in self.state])
+            if self.state is not None
+            else nullcontext()
+        )
+        self.previous, self.children = self.children, []
+        _rendering.append(self)
+        try:
+            with resumed, untracked():
+                element = self.component.fn(*self.args, **self.kwargs)
+        finally:
+            _rendering.pop()
+            self.previous = []
+        if owner is not None:
+            self.state = [s for s in owner.signals[start:] if type(s) is ReadSignal]
+        return element
+
+
+def fingerprint(fn) -> tuple:
+    """
+    The code of `fn` and the markup of the static elements hoisted out of it,
+    which change together with its source.
+    """
+    names = set()
+    stack = [fn.__code__]
+    while stack:
+        code = stack.pop()
+        names.update(n for n in code.co_names if n.startswith("_fez_static_"))
+        stack.extend(c for c in code.co_consts if hasattr(c, "co_names"))
+    statics = tuple(
+        "".join(fn.__globals__[name].stream_html())
+        for name in sorted(names)
+        if name in fn.__globals__
+    )
+    return fn.__code__, statics
+
+
+def register(fn) -> HotComponent:
+    """
+    Wrap a compiled component, or swap it into the wrapper already made for
+    the same module and name.
+    """
+    key = f"{fn.__module__}.{fn.__qualname__}"
+    component = components.get(key)
+    if component is None:
+        component = components[key] = HotComponent(fn)
+    else:
+        component.swap(fn)
+    return component
+
+
+def reload(name: str, source: str, filename: str | None = None):
+    """
+    Re-run a module's new source in its existing namespace, rendering every
+    swapped component once.
+    """
+    module = sys.modules[name]
+    filename = filename or module.__file__
+    # components compiled at runtime read their new source from here
+    linecache.cache[filename] = (len(source), None, source.splitlines(True), filename)
+    code = compile(source, filename, "exec")
+    with batch():
+        exec(code, module.__dict__)
+
+
+def connect(path: str = RELOAD_PATH):
+    """
+    Make components rendered from now on swappable, and reload the modules
+    the dev server reports as changed.
+    """
+    global enabled
+    from browser import window
+
+    enabled = True
+
+    def on_message(event):
+        for change in json.loads(event.data)["modules"]:
+            if change["module"] not in sys.modules:
+                continue
+            with open(f"{change['path']}?{time.time()}") as f:
+                reload(change["module"], f.read(), change["path"])
+
+    events = window.EventSource.new(path)
+    events.onmessage = on_message
+    return events
@@ -1,31 +1,306 @@
 import contextlib
-import io
+import gzip
+import importlib
+import json
 import os
+import queue
 import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from http import HTTPStatus
 from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
 import socket
 
-from fezcompile import precompile_module
+import fez
+import rw_signal
+from build import MANIFEST, walk
+from fezcompile import precompile_module, source_hash
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+@dataclass
+class CompiledModule:
+    mtime: int
+    size: int
+    etag: str
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def body(self, encoding: str) -> bytes:
+        if encoding not in self.encoded:
+            identity = self.encoded["identity"]
+            if encoding == "br":
+                self.encoded[encoding] = brotli.compress(identity)
+            elif encoding == "gzip":
+                self.encoded[encoding] = gzip.compress(identity, mtime=0)
+        return self.encoded[encoding]
+
+
+class ModuleWatcher(threading.Thread):
+    """
+    Poll the modules under `directory`, precompile the ones that changed and
+    publish their paths and module names to every subscriber.
+    """
+
+    def __init__(self, directory: str, compile, interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.directory = directory
+        self.compile = compile
+        self.interval = interval
+        self.stats = self.scan()
+        self.subscribers: list[queue.Queue] = []
+        self.lock = threading.Lock()
+
+    def scan(self) -> dict[str, tuple[int, int]]:
+        stats = {}
+        for rel in walk(self.directory, os.path.join(self.directory, "dist")):
+            if rel.endswith(".py"):
+                with contextlib.suppress(OSError):
+                    st = os.stat(os.path.join(self.directory, rel))
+                    stats[rel] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.poll()
+
+    def poll(self) -> list[dict[str, str]]:
+        stats = self.scan()
+        changed = [rel for rel, stat in stats.items() if self.stats.get(rel) != stat]
+        self.stats = stats
+
+        modules = []
+        for rel in changed:
+            try:
+                self.compile(os.path.join(self.directory, rel))
+            except (OSError, SyntaxError) as e:
+                print(f"hot reload: {rel}: {e}", file=sys.stderr)
+                continue
+            name = rel.removesuffix(".py").removesuffix("/__init__")
+            modules.append({"path": f"/{rel}", "module": name.replace("/", ".")})
+        if modules:
+            self.publish({"modules": modules})
+        return modules
+
+    def subscribe(self) -> queue.Queue:
+        events = queue.Queue()
+        with self.lock:
+            self.subscribers.append(events)
+        return events
+
+    def unsubscribe(self, events: queue.Queue):
+        with self.lock:
+            self.subscribers.remove(events)
+
+    def publish(self, event: dict):
+        with self.lock:
+            for events in self.subscribers:
+                events.put(event)
 
 
 class RequestHandler(SimpleHTTPRequestHandler):
-    CACHED_MODULES: dict[str, bytes] = {}
+    CACHED_MODULES: OrderedDict[str, CompiledModule] = OrderedDict()
+    MAX_CACHED_MODULES = 256
+    CACHE_LOCK = threading.Lock()
+
+    SSR_PAGES = {"/": "index.html", "/index.html": "index.html"}
+    SSR_ENTRY = "fez:main_component"
+    SSR_MARKER = b"<!--fez-ssr-->"
+    # rw_signal keeps the state of a render in module globals
+    RENDER_LOCK = threading.Lock()
+
+    HOT_RELOAD_PATH = "/__fez/hot"
+    # tells the page to call hot.connect
+    HOT_RELOAD_FLAG = b"<script>var FEZ_DEV = true;</script>"
+    HOT_RELOAD_PING = 15
+    WATCHERS: dict[str, ModuleWatcher] = {}
+    WATCHERS_LOCK = threading.Lock()
 
     def do_GET(self):
         """Serve a GET request."""
-        f = self.send_head()
-        if f:
-            try:
-                if ".py?" in self.path:
-                    content = f.read().decode()
-                    content = precompile_module(content)
-                    f = io.BytesIO()
-                    f.write(content.encode())
-                    f.seek(0)
+        if ".py?" in self.path and not self.precompiled():
+            self.send_module()
+        elif self.path == self.HOT_RELOAD_PATH and not self.precompiled():
+            self.send_reload_events()
+        elif self.path in self.SSR_PAGES:
+            self.send_rendered_page(self.SSR_PAGES[self.path])
+        else:
+            super().do_GET()
+
+    def do_HEAD(self):
+        """Serve a HEAD request."""
+        if ".py?" in self.path and not self.precompiled():
+            self.send_module(include_body=False)
+        else:
+            super().do_HEAD()
+
+    def precompiled(self) -> bool:
+        """A directory produced by build.py is served as-is."""
+        return os.path.exists(os.path.join(self.directory, MANIFEST))
+
+    def send_module(self, include_body=True):
+        path = self.translate_path(self.path)
+        try:
+            module = self.compiled_module(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        if module.etag in self.if_none_match():
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", module.etag)
+            self.end_headers()
+            return
+
+        encoding = self.choose_encoding()
+        body = module.body(encoding)
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", self.guess_type(path))
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", module.etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def send_rendered_page(self, page: str):
+        """
+        Stream `page` with the entry component rendered in place of
+        SSR_MARKER. The head is flushed before the component is rendered.
+        Unless the directory is a build, HOT_RELOAD_FLAG follows the state.
+
+        rw_signal keeps the state of a render in module globals, so renders
+        stream one at a time.
+        """
+        try:
+            with open(os.path.join(self.directory, page), "rb") as f:
+                template = f.read()
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        if self.SSR_MARKER not in template:
+            super().do_GET()
+            return
+
+        module_name, _, component_name = self.SSR_ENTRY.partition(":")
+        entry = getattr(importlib.import_module(module_name), component_name)
+        head, _, tail = template.partition(self.SSR_MARKER)
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        chunked = self.request_version == "HTTP/1.1"
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.close_connection = True
+        self.end_headers()
+
+        def write(data: bytes):
+            if not data:
+                return
+            if chunked:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            else:
+                self.wfile.write(data)
+            self.wfile.flush()
+
+        write(head)
+        with self.RENDER_LOCK:
+            with rw_signal.record_signals() as signals:
+                for chunk in fez.stream_html(entry()):
+                    write(chunk.encode())
+            write(fez.state_script(signals).encode())
+        if not self.precompiled():
+            write(self.HOT_RELOAD_FLAG)
+        write(tail)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def send_reload_events(self):
+        """
+        Stream the modules that change from now on as server-sent events,
+        for `hot.connect`.
+        """
+        with self.WATCHERS_LOCK:
+            watcher = self.WATCHERS.get(self.directory)
+            if watcher is None:
+                watcher = ModuleWatcher(self.directory, self.compiled_module)
+                watcher.start()
+                self.WATCHERS[self.directory] = watcher
+        events = watcher.subscribe()
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.close_connection = True
+        self.end_headers()
+        try:
+            while True:
+                try:
+                    event = events.get(timeout=self.HOT_RELOAD_PING)
+                    self.wfile.write(b"data: %s\n\n" % json.dumps(event).encode())
+                except queue.Empty:
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            watcher.unsubscribe(events)
+
+    @classmethod
+    def compiled_module(cls, path: str) -> CompiledModule:
+        """
+        Compile a module at most once per content change. A changed mtime
+        only costs a re-read and hash if the content is the same.
+        """
+        st = os.stat(path)
+        with cls.CACHE_LOCK:
+            module = cls.CACHED_MODULES.get(path)
+            if module and (module.mtime, module.size) == (st.st_mtime_ns, st.st_size):
+                cls.CACHED_MODULES.move_to_end(path)
+                return module
+
+        with open(path, "rb") as f:
+            source = f.read()
+        etag = f'"{source_hash(source)}"'
+        if not module or module.etag != etag:
+            compiled = precompile_module(source.decode(), hot=True).encode()
+            module = CompiledModule(0, 0, etag, {"identity": compiled})
+        module.mtime, module.size = st.st_mtime_ns, st.st_size
+
+        with cls.CACHE_LOCK:
+            cls.CACHED_MODULES[path] = module
+            cls.CACHED_MODULES.move_to_end(path)
+            while len(cls.CACHED_MODULES) > cls.MAX_CACHED_MODULES:
+                cls.CACHED_MODULES.popitem(last=False)
+        return module
+
+    def if_none_match(self) -> set[str]:
+        header = self.headers.get("If-None-Match", "")
+        return {tag.strip().removeprefix("W/") for tag in header.split(",")}
 
-                self.copyfile(f, self.wfile)
-            finally:
-                f.close()
+    def choose_encoding(self) -> str:
+        accepted = set()
+        for part in self.headers.get("Accept-Encoding", "").split(","):
+            name, _, q = part.replace(" ", "").partition(";q=")
+            with contextlib.suppress(ValueError):
+                if float(q or 1) > 0:
+                    accepted.add(name.lower())
+        if brotli and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return "identity"
 
 
 def _get_best_family(*address):
@@ -38,7 +313,7 @@ def _get_best_family(*address):
     return family, sockaddr
 
 
-def test(HandlerClass, ServerClass, protocol="HTTP/1.0", port=8000, bind=None):
+def test(HandlerClass, ServerClass, protocol="HTTP/1.1", port=8000, bind=None):
     """Test the HTTP request handler class.
 
     This runs an HTTP server on port 8000 (or the port argument).
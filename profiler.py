@@ -0,0 +1,138 @@
+"""
+Opt-in profiling of the signal graph, keyed by each signal's `line_from`.
+
+    with Profiler() as profile:
+        set_rows(rows)
+    print(profile.json())
+    open("rows.folded", "w").write(profile.collapsed())
+
+While no profiler is running, the graph only pays for a `None` check.
+"""
+
+import json
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict
+from typing import Callable
+
+import rw_signal
+
+try:
+    from browser.html import MUTATIONS
+except ImportError:
+    MUTATIONS = None
+
+
+@dataclass
+class LineStats:
+    recomputes: int = 0
+    rerenders: int = 0
+    fn_time: float = 0.0
+    rerender_time: float = 0.0
+    dom_ops: int = 0
+    fan_out: int = 0
+
+
+class Frame:
+    __slots__ = ("name", "stats", "kind", "start", "ops", "child_time", "child_ops")
+
+    def __init__(self, name, stats, kind, start, ops):
+        self.name = name
+        self.stats = stats
+        self.kind = kind
+        self.start = start
+        self.ops = ops
+        self.child_time = 0.0
+        self.child_ops = 0
+
+
+class Profiler:
+    """
+    Records, per `line_from`, how often each signal recomputed and rerendered,
+    the time spent in each, the DOM operations it made itself and how many
+    dependents its updates fanned out to.
+
+    `dom_ops` returns a running count of DOM operations; by default it reads
+    the in-memory DOM's `MUTATIONS`, and counts nothing in the browser.
+    """
+
+    def __init__(self, dom_ops: Callable[[], int] | None = None):
+        if dom_ops is None and MUTATIONS is not None:
+            dom_ops = MUTATIONS.total
+        self.dom_ops = dom_ops or (lambda: 0)
+        self.stats: dict[str, LineStats] = {}
+        self.stacks: Counter[str] = Counter()
+        self.frames: list[Frame] = []
+
+    def start(self):
+        rw_signal._profiler = self
+
+    def stop(self):
+        if rw_signal._profiler is self:
+            rw_signal._profiler = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def enter(self, s: rw_signal.ReadSignal, kind: str) -> LineStats:
+        name = str(s.line_from or type(s).__name__)
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = LineStats()
+        if kind == "fn":
+            stats.recomputes += 1
+        else:
+            stats.rerenders += 1
+        self.frames.append(
+            Frame(name, stats, kind, time.perf_counter(), self.dom_ops())
+        )
+        return stats
+
+    def exit(self):
+        frame = self.frames.pop()
+        elapsed = time.perf_counter() - frame.start
+        ops = self.dom_ops() - frame.ops
+        if frame.kind == "fn":
+            frame.stats.fn_time += elapsed
+        else:
+            frame.stats.rerender_time += elapsed
+        frame.stats.dom_ops += ops - frame.child_ops
+
+        path = ";".join(
+            f"{f.name} ({f.kind})".replace(";", ",") for f in [*self.frames, frame]
+        )
+        self.stacks[path] += round((elapsed - frame.child_time) * 1e6)
+        if self.frames:
+            self.frames[-1].child_time += elapsed
+            self.frames[-1].child_ops += ops
+
+    def rerender(self, s: rw_signal.ReadSignal):
+        stats = self.enter(s, "rerender")
+        try:
+            s.replace_dom()
+        finally:
+            self.exit()
+        stats.fan_out += len(s.dependents)
+
+    def report(self) -> dict[str, dict]:
+        """Stats per line, slowest first. Times are in seconds."""
+        lines = sorted(
+            self.stats.items(),
+            key=lambda item: item[1].fn_time + item[1].rerender_time,
+            reverse=True,
+        )
+        return {name: asdict(stats) for name, stats in lines}
+
+    def json(self, indent: int | None = 2) -> str:
+        return json.dumps(self.report(), indent=indent)
+
+    def collapsed(self) -> str:
+        """
+        Self time in microseconds per stack, in the collapsed format read by
+        flamegraph.pl and speedscope.
+        """
+        return "".join(f"{path} {us}\n" for path, us in self.stacks.items())
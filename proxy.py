@@ -1,8 +1,20 @@
+from types import ModuleType
+from typing import NamedTuple, Protocol
+
+
+class Splice(NamedTuple):
+    """
+    `removed` items were replaced by `inserted` items, starting at `index`.
+    """
+
+    index: int
+    removed: list
+    inserted: list
+
+
 def getfn(name):
     def fn(self, *args, **kwargs):
-        value = getattr(self.proxied_item, name)(*args, **kwargs)
-        self.on_change()
-        return value
+        return getattr(self.proxied_item, name)(*args, **kwargs)
 
     return fn
 
@@ -22,13 +34,118 @@ class Proxy:
         self.on_change()
 
 
-ListProxy = type(
-    "ListProxy",
-    (Proxy,),
-    {
-        **{name: getfn(name) for name in ["append", "clear", "insert", "__iter__"]},
-    },
-)
+class ListProxy(Proxy):
+    """
+    Reports every mutation to `on_change` as a `Splice`. Reads never notify.
+    """
+
+    def splice(self, index: int, removed: list, inserted: list):
+        if removed or inserted:
+            self.on_change(Splice(index, removed, inserted))
+
+    def replaced(self, old: list):
+        if old != self.proxied_item:
+            self.splice(0, old, self.proxied_item.copy())
+
+    def append(self, item):
+        self.proxied_item.append(item)
+        self.splice(len(self.proxied_item) - 1, [], [item])
+
+    def extend(self, items):
+        index = len(self.proxied_item)
+        self.proxied_item.extend(items)
+        self.splice(index, [], self.proxied_item[index:])
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def __imul__(self, n: int):
+        if n <= 0:
+            self.clear()
+        else:
+            index = len(self.proxied_item)
+            self.proxied_item *= n
+            self.splice(index, [], self.proxied_item[index:])
+        return self
+
+    def insert(self, index: int, item):
+        index = slice(index, None).indices(len(self.proxied_item))[0]
+        self.proxied_item.insert(index, item)
+        self.splice(index, [], [item])
+
+    def pop(self, index: int = -1):
+        if -len(self.proxied_item) <= index < 0:
+            index += len(self.proxied_item)
+        item = self.proxied_item.pop(index)
+        self.splice(index, [item], [])
+        return item
+
+    def remove(self, item):
+        index = self.proxied_item.index(item)
+        del self.proxied_item[index]
+        self.splice(index, [item], [])
+
+    def clear(self):
+        old = self.proxied_item.copy()
+        self.proxied_item.clear()
+        self.splice(0, old, [])
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice) and key.step not in (None, 1):
+            old = self.proxied_item.copy()
+            self.proxied_item[key] = value
+            self.replaced(old)
+        elif isinstance(key, slice):
+            start, stop, _ = key.indices(len(self.proxied_item))
+            removed = self.proxied_item[start:stop]
+            value = list(value)
+            self.proxied_item[key] = value
+            self.splice(start, removed, value)
+        else:
+            index = range(len(self.proxied_item))[key]
+            removed = self.proxied_item[index]
+            self.proxied_item[index] = value
+            self.splice(index, [removed], [value])
+
+    def __delitem__(self, key):
+        if isinstance(key, slice) and key.step not in (None, 1):
+            old = self.proxied_item.copy()
+            del self.proxied_item[key]
+            self.replaced(old)
+        elif isinstance(key, slice):
+            start, stop, _ = key.indices(len(self.proxied_item))
+            removed = self.proxied_item[start:stop]
+            del self.proxied_item[key]
+            self.splice(start, removed, [])
+        else:
+            index = range(len(self.proxied_item))[key]
+            removed = self.proxied_item[index]
+            del self.proxied_item[index]
+            self.splice(index, [removed], [])
+
+    def sort(self, *, key=None, reverse=False):
+        old = self.proxied_item.copy()
+        self.proxied_item.sort(key=key, reverse=reverse)
+        self.replaced(old)
+
+    def reverse(self):
+        old = self.proxied_item.copy()
+        self.proxied_item.reverse()
+        self.replaced(old)
+
+
+for name in [
+    "__iter__",
+    "__len__",
+    "__getitem__",
+    "__contains__",
+    "__reversed__",
+    "index",
+    "count",
+    "copy",
+]:
+    setattr(ListProxy, name, getfn(name))
 
 
 def proxy(proxied_item, on_change) -> Proxy:
@@ -36,3 +153,263 @@ def proxy(proxied_item, on_change) -> Proxy:
         return ListProxy(proxied_item, on_change)
 
     return Proxy(proxied_item, on_change)
+
+
+class Tree(Protocol):
+    """
+    What a `View` reports to: reads and changes by path, where a path ends
+    with `SHAPE` for the keys or length of a container.
+    """
+
+    def read(self, path: tuple): ...
+
+    def changed(self, path: tuple): ...
+
+    def check_writable(self): ...
+
+
+SHAPE = object()
+MISSING = object()
+
+
+class View:
+    """
+    A lazily wrapped container at `path` in a tree. Reading a key reports
+    its path, and returns a view of it if it is a container; mutating one
+    reports the paths that changed.
+    """
+
+    __slots__ = ("_item", "_path", "_tree")
+
+    def __init__(self, item, path: tuple, tree: Tree):
+        object.__setattr__(self, "_item", item)
+        object.__setattr__(self, "_path", path)
+        object.__setattr__(self, "_tree", tree)
+
+    def _get(self, key, value):
+        path = (*self._path, key)
+        self._tree.read(path)
+        return view(value, path, self._tree)
+
+    def _set(self, key, old, new) -> bool:
+        if old is new:
+            return False
+        self._tree.changed((*self._path, key))
+        return True
+
+    def _reshaped(self):
+        self._tree.changed((*self._path, SHAPE))
+
+    def _shape(self):
+        self._tree.read((*self._path, SHAPE))
+
+    def __eq__(self, other):
+        return self._item == unwrap(other)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self._item!r})"
+
+
+class DictView(View):
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        return self._get(key, self._item[key])
+
+    def get(self, key, default=None):
+        value = self._item.get(key, MISSING)
+        if value is MISSING:
+            self._tree.read((*self._path, key))
+            return default
+        return self._get(key, value)
+
+    def __contains__(self, key):
+        self._shape()
+        return key in self._item
+
+    def __iter__(self):
+        self._shape()
+        return iter(list(self._item))
+
+    def __len__(self):
+        self._shape()
+        return len(self._item)
+
+    def keys(self):
+        self._shape()
+        return list(self._item)
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def __setitem__(self, key, value):
+        self._tree.check_writable()
+        value = unwrap(value)
+        old = self._item.get(key, MISSING)
+        self._item[key] = value
+        if self._set(key, old, value) and old is MISSING:
+            self._reshaped()
+
+    def __delitem__(self, key):
+        self._tree.check_writable()
+        del self._item[key]
+        self._tree.changed((*self._path, key))
+        self._reshaped()
+
+    def pop(self, key, *default):
+        self._tree.check_writable()
+        if key not in self._item:
+            return self._item.pop(key, *default)
+        value = self._item[key]
+        del self[key]
+        return value
+
+    def setdefault(self, key, default=None):
+        if key not in self._item:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in list(self._item):
+            del self[key]
+
+
+class ListView(View):
+    __slots__ = ()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(len(self))[index]]
+        index = range(len(self._item))[index]
+        return self._get(index, self._item[index])
+
+    def __len__(self):
+        self._shape()
+        return len(self._item)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, value):
+        self._shape()
+        return unwrap(value) in self._item
+
+    def index(self, value, *args):
+        self._shape()
+        return self._item.index(unwrap(value), *args)
+
+    def __setitem__(self, index, value):
+        self._tree.check_writable()
+        if isinstance(index, slice):
+            length = len(self._item)
+            start = min(range(length)[index], default=length)
+            self._item[index] = [unwrap(v) for v in value]
+            self._moved(start, length)
+            return
+        index = range(len(self._item))[index]
+        old = self._item[index]
+        self._item[index] = value = unwrap(value)
+        self._set(index, old, value)
+
+    def _moved(self, start: int, old_length: int):
+        """Every index from `start` may hold a different item now."""
+        for i in range(start, max(old_length, len(self._item))):
+            self._tree.changed((*self._path, i))
+        if old_length != len(self._item):
+            self._reshaped()
+
+    def append(self, value):
+        self.insert(len(self._item), value)
+
+    def extend(self, values):
+        self._tree.check_writable()
+        length = len(self._item)
+        self._item.extend(unwrap(v) for v in values)
+        self._moved(length, length)
+
+    def insert(self, index: int, value):
+        self._tree.check_writable()
+        length = len(self._item)
+        index = slice(index, None).indices(length)[0]
+        self._item.insert(index, unwrap(value))
+        self._moved(index, length)
+
+    def pop(self, index: int = -1):
+        self._tree.check_writable()
+        length = len(self._item)
+        index = range(length)[index]
+        value = self._item.pop(index)
+        self._moved(index, length)
+        return value
+
+    def remove(self, value):
+        self.pop(self._item.index(unwrap(value)))
+
+    def __delitem__(self, index):
+        if isinstance(index, slice):
+            for i in sorted(range(len(self._item))[index], reverse=True):
+                self.pop(i)
+        else:
+            self.pop(index)
+
+    def clear(self):
+        self._tree.check_writable()
+        length = len(self._item)
+        self._item.clear()
+        self._moved(0, length)
+
+    def sort(self, *, key=None, reverse=False):
+        self._tree.check_writable()
+        self._item.sort(key=key, reverse=reverse)
+        self._moved(0, len(self._item))
+
+    def reverse(self):
+        self._tree.check_writable()
+        self._item.reverse()
+        self._moved(0, len(self._item))
+
+
+class ObjectView(View):
+    """A view of an object's attributes, such as a dataclass instance."""
+
+    __slots__ = ()
+
+    def __getattr__(self, name):
+        return self._get(name, getattr(self._item, name))
+
+    def __setattr__(self, name, value):
+        self._tree.check_writable()
+        value = unwrap(value)
+        old = getattr(self._item, name, MISSING)
+        setattr(self._item, name, value)
+        self._set(name, old, value)
+
+    def __delattr__(self, name):
+        self._tree.check_writable()
+        delattr(self._item, name)
+        self._tree.changed((*self._path, name))
+
+
+def view(item, path: tuple, tree: Tree):
+    """`item` wrapped in a view if it is a container, otherwise itself."""
+    if isinstance(item, dict):
+        return DictView(item, path, tree)
+    if isinstance(item, list):
+        return ListView(item, path, tree)
+    if hasattr(item, "__dict__") and not callable(item) and not isinstance(
+        item, ModuleType
+    ):
+        return ObjectView(item, path, tree)
+    return item
+
+
+def unwrap(value):
+    return value._item if isinstance(value, View) else value
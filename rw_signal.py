@@ -1,4 +1,31 @@
-from proxy import proxy, Proxy
+import heapq
+import inspect
+import itertools
+import json
+import operator
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Coroutine, Iterable
+
+from proxy import proxy, view, Proxy, Splice
+
+
+# log signal creation; opt in with FEZ_DEBUG=1
+DEBUG = os.environ.get("FEZ_DEBUG", "") not in ("", "0")
+
+_batch_depth = 0
+_flushing = False
+_queue: list[tuple[int, int, "ReadSignal"]] = []
+_queued: set["ReadSignal"] = set()
+_order = itertools.count()
+_recorded: list["ReadSignal"] | None = None
+_resumed = None
+_tracking: list[set["ReadSignal"]] = []
+_owner: "Owner | None" = None
+_profiler = None
+# bumped whenever a computed becomes clean or the graph changes
+_epoch = 0
 
 
 class ReadSignal[T]:
@@ -7,26 +34,36 @@ class ReadSignal[T]:
         self.v = v
         self.dependents: set[ReadSignal] = set()
         self.depends_on: set[ReadSignal] = set()
+        self.height = 0
+        self.changes: list[Splice] | None = []
+        self.invalidated = -1
 
         self.dirty = False
 
     def __call__(self):
+        if _tracking:
+            _tracking[-1].add(self)
         return self.v.proxied_item
 
     def destroy(self):
         for k in self.depends_on:
             k.remove_dependent(self)
+        for k in self.dependents:
+            k.depends_on.discard(self)
+        self.depends_on = set()
+        self.dependents = set()
 
     def add_dependent(self, s):
         self.dependents.add(s)
 
     def remove_dependent(self, s):
-        self.dependents.remove(s)
+        self.dependents.discard(s)
 
     def trigger_update(self):
-        self.replace_dom()
-        for k in self.dependents:
-            k.trigger_update()
+        invalidate(self)
+        enqueue(self)
+        if not _batch_depth:
+            _scheduler.schedule(flush)
 
     def replace_dom(self): ...
 
@@ -37,16 +74,195 @@ class ReadSignal[T]:
         return str(self)
 
 
+def invalidate(s: ReadSignal):
+    """
+    Mark the computed signals downstream of `s` dirty now, so that reading
+    one before the flush, such as later in the same batch, recomputes it.
+    Nothing to do if none became clean, and no edge changed, since the
+    last time.
+    """
+    if s.invalidated == _epoch:
+        return
+    s.invalidated = _epoch
+    stack = list(s.dependents)
+    seen = set()
+    while stack:
+        k = stack.pop()
+        if k in seen:
+            continue
+        seen.add(k)
+        if isinstance(k, ComputedSignal):
+            # everything downstream of a dirty computed is dirty already
+            if k.dirty:
+                continue
+            k.dirty = True
+        stack.extend(k.dependents)
+
+
+def enqueue(s: ReadSignal):
+    if s not in _queued:
+        _queued.add(s)
+        heapq.heappush(_queue, (s.height, next(_order), s))
+
+
+def flush():
+    """
+    Run every queued signal in height order, so each dependent runs once,
+    after all of the signals it depends on.
+
+    Dependents can read the `Splice`s a list signal recorded from its
+    `changes` until the flush ends; None means the value was replaced.
+    """
+    global _flushing
+    if _flushing:
+        return
+    _flushing = True
+    flushed = []
+    try:
+        while _queue:
+            _, _, s = heapq.heappop(_queue)
+            _queued.discard(s)
+            flushed.append(s)
+            s.dirty = False
+            if _profiler is None:
+                s.replace_dom()
+            else:
+                _profiler.rerender(s)
+            for k in s.dependents:
+                enqueue(k)
+    finally:
+        _flushing = False
+        for s in flushed:
+            s.changes = []
+
+
+@contextmanager
+def batch():
+    """
+    Defer updates until the outermost batch exits.
+    """
+    global _batch_depth
+    _batch_depth += 1
+    try:
+        yield
+    finally:
+        _batch_depth -= 1
+        if not _batch_depth and _queue:
+            _scheduler.schedule(flush)
+
+
+def batched(fn):
+    def wrapper(*args, **kwargs):
+        with batch():
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
+class Scheduler:
+    """
+    Decides when queued signals are flushed. The base scheduler flushes
+    synchronously, inside the write that queued them.
+    """
+
+    def schedule(self, flush: Callable[[], None]):
+        flush()
+
+    def spawn(self, coroutine: Coroutine):
+        """
+        Run `coroutine` in the background, for a resource refetched outside
+        of a running event loop. Returns a task to cancel it, or None.
+        """
+        raise RuntimeError(
+            "no running event loop to fetch the resource in; pass it a loop or "
+            "set_scheduler() one that can spawn coroutines"
+        )
+
+
+class DeferredScheduler(Scheduler):
+    """
+    Coalesces every write until the next `defer` callback into one flush.
+    """
+
+    def __init__(self):
+        self.pending = False
+
+    def schedule(self, flush: Callable[[], None]):
+        if not self.pending:
+            self.pending = True
+            self.defer(lambda *_: self.run(flush))
+
+    def run(self, flush: Callable[[], None]):
+        self.pending = False
+        flush()
+
+    def defer(self, callback: Callable[..., None]): ...
+
+
+class AnimationFrameScheduler(DeferredScheduler):
+    def defer(self, callback):
+        from browser import window
+
+        window.requestAnimationFrame(callback)
+
+    def spawn(self, coroutine):
+        from browser import aio
+
+        aio.run(coroutine)
+
+
+class AsyncioScheduler(DeferredScheduler):
+    def __init__(self, loop=None):
+        super().__init__()
+        self.loop = loop
+
+    def defer(self, callback):
+        import asyncio
+
+        (self.loop or asyncio.get_running_loop()).call_soon(callback)
+
+    def spawn(self, coroutine):
+        import asyncio
+
+        return (self.loop or asyncio.get_running_loop()).create_task(coroutine)
+
+
+_scheduler: Scheduler = Scheduler()
+
+
+def set_scheduler(scheduler: Scheduler) -> Scheduler:
+    global _scheduler
+    previous, _scheduler = _scheduler, scheduler
+    return previous
+
+
+def flush_sync():
+    """
+    Flush whatever is queued now, without waiting for the scheduler.
+    """
+    if not _batch_depth:
+        flush()
+
+
 class WriteSignal[T]:
-    def __init__(self, v: Proxy, read_signal: ReadSignal, line_from: str):
+    def __init__(
+        self,
+        v: Proxy,
+        read_signal: ReadSignal,
+        line_from: str,
+        equals: Callable[[T, T], bool] | None = None,
+    ):
         self.line_from = line_from
         self.read_signal = read_signal
         self.v = v
+        self.equals = equals
 
     def __call__(self, *args):
         # type: (self, *args) -> T
         if not args:
             return self.v
+        if self.equals is not None and self.equals(self.v.proxied_item, args[0]):
+            return None
         self.v.set_value(args[0])
         return None
 
@@ -60,18 +276,83 @@ class WriteSignal[T]:
 def signal[T](
     initial_value: T,
     line_from: str = None,
+    equals: Callable[[T, T], bool] | None = None,
 ) -> tuple[ReadSignal[T], WriteSignal[T]]:
-    def on_change():
+    """
+    A value and its setter. By default every write notifies, so writing
+    back a list mutated outside the signal still re-renders. With `equals`,
+    setting a value that equals the current one notifies nobody:
+    `operator.is_` skips the same object, `operator.eq` equal values.
+    Mutating a list in place always notifies.
+    """
+
+    def on_change(change: Splice | None = None):
         read.dirty = True
+        if change is None:
+            read.changes = None
+        elif read.changes is not None:
+            read.changes.append(change)
         read.trigger_update()
 
+    if _resumed is not None:
+        resumed = next(_resumed, None)
+        if resumed is not None:
+            initial_value = resumed[0]
+
     value = proxy(initial_value, on_change)
 
     read = ReadSignal(value, line_from)
-    write = WriteSignal(value, read, line_from)
+    write = WriteSignal(value, read, line_from, equals)
+    if _recorded is not None:
+        _recorded.append(read)
+    if _owner is not None:
+        _owner.signals.append(read)
     return read, write
 
 
+@contextmanager
+def record_signals():
+    """
+    Collect every signal created in this block, in creation order.
+    """
+    global _recorded
+    previous, _recorded = _recorded, []
+    try:
+        yield _recorded
+    finally:
+        _recorded = previous
+
+
+@contextmanager
+def resume_signals(values: list):
+    """
+    Start the signals created in this block from `values`, as produced by
+    `dump_signals` for a run that created signals in the same order.
+    """
+    global _resumed
+    previous, _resumed = _resumed, iter(values)
+    try:
+        yield
+    finally:
+        _resumed = previous
+
+
+def dump_signals(signals: list[ReadSignal]) -> list:
+    """
+    Wrap each JSON-serializable value in a list; others become None and
+    keep their initial value when resumed.
+    """
+    values = []
+    for s in signals:
+        value = s.state if isinstance(s, Store) else s()
+        try:
+            json.dumps(value)
+            values.append([value])
+        except (TypeError, ValueError):
+            values.append(None)
+    return values
+
+
 class SyntheticSignal[T](ReadSignal):
     def __init__(self, fn, line_from):
         super().__init__(None, line_from)
@@ -81,20 +362,554 @@ class SyntheticSignal[T](ReadSignal):
     def __call__(self, *args):
         return self.fn(*args)
 
+    def evaluate(self):
+        """
+        Call fn and subscribe to exactly the signals it read, including any
+        read while a returned generator runs. A generator is run to the end
+        and returned as `Owned` items.
+        """
+        with self.tracking():
+            value = self()
+            if inspect.isgenerator(value):
+                value = own_each(value)
+        return value
+
+    @contextmanager
+    def tracking(self, reads: set[ReadSignal] | None = None):
+        """
+        Subscribe to exactly the signals read in this block, plus `reads`,
+        which collects them across several blocks.
+        """
+        reads = set() if reads is None else reads
+        _tracking.append(reads)
+        profiler = _profiler
+        if profiler is not None:
+            profiler.enter(self, "fn")
+        try:
+            yield
+        finally:
+            if profiler is not None:
+                profiler.exit()
+            _tracking.pop()
+            reads.discard(self)
+            self.resubscribe(reads)
+
+    def resubscribe(self, signals_used: set[ReadSignal]):
+        global _epoch
+        if signals_used == self.depends_on:
+            return
+        _epoch += 1
+        for s in self.depends_on - signals_used:
+            s.remove_dependent(self)
+        for s in signals_used - self.depends_on:
+            s.add_dependent(self)
+        self.depends_on = signals_used
+        self.update_height()
+
+    def update_height(self):
+        height = max((s.height + 1 for s in self.depends_on), default=0)
+        if height != self.height:
+            self.height = height
+            for k in self.dependents:
+                k.update_height()
+
     def replace_dom(self):
         if self.rerender:
             self.rerender()
 
-    @staticmethod
-    def new(fn, *signals_used: ReadSignal, line_from: str):
-        print("new syn signal", fn, line_from)
-        syn = SyntheticSignal(fn, line_from)
+    def destroy(self):
+        super().destroy()
+        self.rerender = None
+
+    @classmethod
+    def new(cls, fn, *signals_used: ReadSignal, line_from: str, **kwargs):
+        if DEBUG:
+            print("new syn signal", fn, line_from)
+        global _epoch
+        syn = cls(fn, line_from, **kwargs)
+        if signals_used:
+            _epoch += 1
         for s in signals_used:
             syn.depends_on.add(s)
             s.add_dependent(syn)
+            syn.height = max(syn.height, s.height + 1)
+        if _owner is not None:
+            _owner.signals.append(syn)
         return syn
 
 
+class ComputedSignal[T](SyntheticSignal):
+    """
+    A derived value that is cached until one of its inputs changes,
+    and only recomputed when it is read again.
+    """
+
+    def __init__(self, fn, line_from):
+        super().__init__(fn, line_from)
+        self.dirty = True
+        self.value = None
+        self.generated = False
+
+    def __call__(self):
+        global _epoch
+        if _tracking:
+            _tracking[-1].add(self)
+        if self.dirty:
+            with self.tracking():
+                value = self.fn()
+                self.generated = inspect.isgenerator(value)
+                self.value = list(value) if self.generated else value
+            self.dirty = False
+            _epoch += 1
+        if self.generated:
+            return (v for v in self.value)
+        return self.value
+
+    def evaluate(self):
+        return self()
+
+    def replace_dom(self):
+        self.dirty = True
+        super().replace_dom()
+
+
+class Owner:
+    """
+    Everything created while rendering one subtree: its signals, cleanups
+    such as unbinding event handlers, and the owners of nested subtrees.
+    Disposing the owner releases all of them.
+    """
+
+    def __init__(self, parent: "Owner | None" = None):
+        self.parent = parent
+        self.children: set[Owner] = set()
+        self.signals: list[ReadSignal] = []
+        self.cleanups: list[Callable[[], None]] = []
+        if parent is not None:
+            parent.children.add(self)
+
+    def on_cleanup(self, fn: Callable[[], None]):
+        self.cleanups.append(fn)
+
+    def dispose(self):
+        for child in list(self.children):
+            child.dispose()
+        for s in self.signals:
+            s.destroy()
+        for fn in self.cleanups:
+            fn()
+        self.signals.clear()
+        self.cleanups.clear()
+        if self.parent is not None:
+            self.parent.children.discard(self)
+            self.parent = None
+
+
+@contextmanager
+def untracked():
+    """
+    Read signals in this block without subscribing the signal being evaluated.
+    """
+    _tracking.append(set())
+    try:
+        yield
+    finally:
+        _tracking.pop()
+
+
+def current_owner() -> Owner | None:
+    return _owner
+
+
+@contextmanager
+def owned_by(owner: Owner | None):
+    global _owner
+    previous, _owner = _owner, owner
+    try:
+        yield owner
+    finally:
+        _owner = previous
+
+
+def on_cleanup(fn: Callable[[], None]):
+    if _owner is not None:
+        _owner.on_cleanup(fn)
+
+
+class Owned(list):
+    """
+    `(item, owner)` pairs from a generator that was advanced with a fresh
+    owner for each item, so whatever producing an item created can be
+    released together with it.
+    """
+
+
+def own_each(items: Iterable) -> Owned:
+    pairs = Owned()
+    items = iter(items)
+    while True:
+        owner = Owner(_owner)
+        with owned_by(owner):
+            try:
+                item = next(items)
+            except StopIteration:
+                owner.dispose()
+                return pairs
+        pairs.append((item, owner))
+
+
+class _Flight:
+    def __init__(self, future):
+        self.future = future
+        self.waiters = 0
+
+
+_flights: dict[tuple, _Flight] = {}
+_resource_cache: dict[tuple, tuple[float, object]] = {}
+
+
+class Resource[T](SyntheticSignal):
+    """
+    The result of awaiting `fetcher(*sources)`, exposed as `value`, `loading`
+    and `error` signals and refetched whenever a source changes.
+
+    A refetch cancels the previous one. Resources waiting on the same
+    fetcher and arguments share one call, and results are cached for `ttl`
+    seconds. Outside of a running loop the fetch is spawned by the
+    scheduler, and a result that arrives after a newer refetch is dropped.
+    """
+
+    def __init__(self, fetcher, line_from, ttl: float = 60.0, loop=None):
+        super().__init__(fetcher, line_from)
+        self.sources: tuple[ReadSignal, ...] = ()
+        self.ttl = ttl
+        self.loop = loop
+        self.task = None
+        self.generation = 0
+        self.value, self.set_value = signal(None, line_from)
+        self.loading, self.set_loading = signal(False, line_from, operator.is_)
+        self.error, self.set_error = signal(None, line_from, operator.is_)
+
+    def __call__(self):
+        return self.value()
+
+    def evaluate(self):
+        return self()
+
+    def replace_dom(self):
+        self.refetch()
+
+    def destroy(self):
+        super().destroy()
+        self.cancel()
+
+    def refetch(self):
+        import asyncio
+
+        self.cancel()
+        args = tuple(s() for s in self.sources)
+        key = (self.fn, args)
+        try:
+            hash(key)
+        except TypeError:
+            key = None
+
+        cached = _resource_cache.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            with batch():
+                self.set_value(cached[1])
+                self.set_error(None)
+                self.set_loading(False)
+            return
+
+        self.set_loading(True)
+        load = self.load(key, args, self.generation)
+        try:
+            loop = self.loop or asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                self.task = _scheduler.spawn(load)
+            except Exception as e:
+                load.close()
+                with batch():
+                    self.set_error(e)
+                    self.set_loading(False)
+            return
+        self.task = loop.create_task(load)
+
+    def cancel(self):
+        self.generation += 1
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def load(self, key, args, generation):
+        import asyncio
+
+        flight = _flights.get(key) if key is not None else None
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(self.fn(*args)))
+            if key is not None:
+                _flights[key] = flight
+                flight.future.add_done_callback(
+                    lambda _: _flights.get(key) is flight and _flights.pop(key)
+                )
+        flight.waiters += 1
+        try:
+            value = await asyncio.shield(flight.future)
+        except asyncio.CancelledError:
+            flight.waiters -= 1
+            if not flight.waiters:
+                flight.future.cancel()
+            raise
+        except Exception as e:
+            flight.waiters -= 1
+            if generation != self.generation:
+                return
+            with batch():
+                self.set_error(e)
+                self.set_loading(False)
+            return
+        flight.waiters -= 1
+
+        if key is not None:
+            now = time.monotonic()
+            expired = [k for k, (until, _) in _resource_cache.items() if until <= now]
+            for k in expired:
+                del _resource_cache[k]
+            _resource_cache[key] = (now + self.ttl, value)
+        if generation != self.generation:
+            return
+        self.task = None
+        with batch():
+            self.set_value(value)
+            self.set_error(None)
+            self.set_loading(False)
+
+
+def resource[T](
+    fetcher: Callable[..., Awaitable[T]],
+    *source_signals: ReadSignal,
+    ttl: float = 60.0,
+    loop=None,
+    line_from: str = None,
+) -> Resource[T]:
+    res = Resource.new(
+        fetcher, *source_signals, line_from=line_from, ttl=ttl, loop=loop
+    )
+    res.sources = source_signals
+    res.refetch()
+    return res
+
+
+class Selector[K](SyntheticSignal):
+    """
+    Whether a key is the one `fn` selects. `selector(k)` only subscribes to
+    changes of its own key, so moving the selection notifies the readers of
+    the previous and the new key, not every reader.
+    """
+
+    def __init__(self, fn, line_from):
+        super().__init__(fn, line_from)
+        self.selected = None
+        self.keys: dict[K, _KeySignal] = {}
+
+    def __call__(self, key: K) -> bool:
+        if _tracking:
+            s = self.keys.get(key)
+            if s is None:
+                s = self.keys[key] = _KeySignal(self, key)
+            _tracking[-1].add(s)
+        return self.selected == key
+
+    def evaluate(self):
+        with self.tracking():
+            self.selected = self.fn()
+        return self.selected
+
+    def add_dependent(self, s):
+        # readers subscribe to their key when they call the selector
+        pass
+
+    def replace_dom(self):
+        previous = self.selected
+        if self.evaluate() == previous:
+            return
+        for key in (previous, self.selected):
+            s = self.keys.get(key)
+            if s is not None:
+                invalidate(s)
+                enqueue(s)
+
+    def update_height(self):
+        super().update_height()
+        for s in self.keys.values():
+            if s.height != self.height + 1:
+                s.height = self.height + 1
+                for k in s.dependents:
+                    k.update_height()
+
+    def destroy(self):
+        super().destroy()
+        for s in list(self.keys.values()):
+            s.destroy()
+        self.keys.clear()
+
+
+class _KeySignal(ReadSignal):
+    def __init__(self, selector: Selector, key):
+        super().__init__(None, selector.line_from)
+        self.selector = selector
+        self.key = key
+        self.height = selector.height + 1
+
+    def __call__(self):
+        return self.selector(self.key)
+
+    def remove_dependent(self, s):
+        super().remove_dependent(s)
+        if not self.dependents and self.selector.keys.get(self.key) is self:
+            del self.selector.keys[self.key]
+
+
+def selector[K](
+    source: Callable[[], K], key: Callable[[K], K] | None = None, line_from=None
+) -> Selector[K]:
+    """
+    Select a key by the value of `source`, or by `key(source())`:
+
+        is_selected = signal.selector(selected_id)
+        div(cls={"selected": lambda: is_selected(row_id)})
+    """
+    fn = source if key is None else lambda: key(source())
+    sel = Selector.new(fn, line_from=line_from or "selector")
+    sel.evaluate()
+    return sel
+
+
+class Store[T](ReadSignal):
+    """
+    One state tree, read through views that subscribe to exactly the paths
+    they read, and changed only inside `produce`, which notifies only the
+    readers of the paths that changed:
+
+        state = signal.store({"todos": [{"title": "a", "done": False}]})
+        span[lambda: state()["todos"][0]["title"]]
+        state.produce(lambda s: s["todos"][0].update(done=True))
+
+    Dicts, lists and objects such as dataclass instances are wrapped as they
+    are read; other values are returned as they are.
+    """
+
+    def __init__(self, state: T, line_from: str):
+        super().__init__(None, line_from)
+        self.state = state
+        self.paths = _PathSignal(None, None, line_from)
+        self.producing = 0
+
+    def __call__(self) -> T:
+        return view(self.state, (), self)
+
+    def add_dependent(self, s):
+        # readers subscribe to the paths they read
+        pass
+
+    def produce(self, fn: Callable[[T], object]):
+        """
+        Apply `fn` to a writable view of the state, in one batch.
+        """
+        with batch():
+            self.producing += 1
+            try:
+                return fn(self())
+            finally:
+                self.producing -= 1
+
+    def set(self, state: T):
+        """Replace the whole tree, notifying every reader."""
+        self.state = state
+        with batch():
+            self.paths.notify()
+
+    def read(self, path: tuple):
+        if _tracking:
+            _tracking[-1].add(self.paths.at(path))
+
+    def changed(self, path: tuple):
+        node = self.paths.find(path)
+        if node is not None:
+            node.notify()
+
+    def check_writable(self):
+        if not self.producing:
+            raise TypeError("a store can only be changed inside produce()")
+
+
+class _PathSignal(ReadSignal):
+    """
+    The readers of one path in a store, and the nodes of the paths below it.
+    A node is dropped once nothing reads it or anything below it.
+    """
+
+    def __init__(self, parent: "_PathSignal | None", key, line_from):
+        super().__init__(None, line_from)
+        self.parent = parent
+        self.key = key
+        self.children: dict[object, _PathSignal] = {}
+
+    def at(self, path: tuple) -> "_PathSignal":
+        node = self
+        for key in path:
+            child = node.children.get(key)
+            if child is None:
+                child = node.children[key] = _PathSignal(node, key, self.line_from)
+            node = child
+        return node
+
+    def find(self, path: tuple) -> "_PathSignal | None":
+        node = self
+        for key in path:
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def notify(self):
+        """Notify the readers of this path and every path below it."""
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.dependents:
+                node.trigger_update()
+            stack.extend(node.children.values())
+
+    def remove_dependent(self, s):
+        super().remove_dependent(s)
+        node = self
+        while (
+            node.parent is not None
+            and not node.dependents
+            and not node.children
+            and node.parent.children.get(node.key) is node
+        ):
+            del node.parent.children[node.key]
+            node = node.parent
+
+
+def store[T](initial_value: T, line_from: str = None) -> Store[T]:
+    if _resumed is not None:
+        resumed = next(_resumed, None)
+        if resumed is not None:
+            initial_value = resumed[0]
+
+    s = Store(initial_value, line_from)
+    if _recorded is not None:
+        _recorded.append(s)
+    if _owner is not None:
+        _owner.signals.append(s)
+    return s
+
+
 def signal_func(*signals_used: ReadSignal, line_from):
     def wrapper(fn):
         return SyntheticSignal.new(fn, *signals_used, line_from=line_from)
@@ -102,4 +917,20 @@ def signal_func(*signals_used: ReadSignal, line_from):
     return wrapper
 
 
+def signal_computed(*signals_used: ReadSignal, line_from=None):
+    match signals_used:
+        case [fn] if callable(fn) and not isinstance(fn, ReadSignal):
+            return ComputedSignal.new(fn, line_from=line_from or fn.__name__)
+
+    def wrapper(fn):
+        return ComputedSignal.new(fn, *signals_used, line_from=line_from)
+
+    return wrapper
+
+
 signal.func = signal_func
+signal.computed = signal_computed
+signal.batch = batch
+signal.resource = resource
+signal.selector = selector
+signal.store = store